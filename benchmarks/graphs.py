@@ -0,0 +1,99 @@
+"""Synthetic flows, as the dicts taken by RunSystem.setup and written by _export.
+
+Every generator takes the number of blocks besides the config, the flows only
+use builtin blocks so they can be saved and loaded back from files.
+"""
+import random
+
+
+
+CONFIG = "jabuti.builtin.config.Config"
+ABS = "jabuti.builtin.math.Abs"
+SUM = "jabuti.builtin.math.Sum"
+
+
+def config(*names: str) -> dict[str, dict]:
+    return {"b0": {"class": CONFIG, "params": {"values": {name: -1 for name in names}}}}
+
+
+def link(links: dict[str, str], output: str, input: str) -> None:
+    links[f"l{len(links) + 1}"] = f"{output}-{input}"
+
+
+def chain(size: int, flags: bool = False) -> dict[str, dict]:
+    """A config feeding a long chain of Abs blocks, each enabling the next one if `flags`."""
+    blocks = config("x")
+    links = {}
+    for i in range(1, size + 1):
+        blocks[f"b{i}"] = {"class": ABS}
+        link(links, f"b{i-1}<{'neg' if i > 1 else 'x'}", f"b{i}>num")
+        if flags and i > 1:
+            link(links, f"b{i-1}<runflag", f"b{i}>enabler")
+    return {"blocks": blocks, "links": links}
+
+
+def fanin(size: int) -> dict[str, dict]:
+    """Abs blocks side by side, all of them summed by a single block."""
+    blocks = config("x")
+    links = {}
+    last = max(size, 2)
+    for i in range(1, last):
+        blocks[f"b{i}"] = {"class": ABS}
+        link(links, "b0<x", f"b{i}>num")
+    blocks[f"b{last}"] = {"class": SUM}
+    for i in range(1, last):
+        link(links, f"b{i}<abs", f"b{last}>nums")
+    return {"blocks": blocks, "links": links}
+
+
+def diamond(size: int) -> dict[str, dict]:
+    """Diamonds one after the other, a split into two branches joined by a Sum."""
+    blocks = config("x")
+    links = {}
+    source = "b0<x"
+    for i in range(1, size - size % 4 + 1, 4):
+        top, left, right, bottom = (f"b{i + n}" for n in range(4))
+        blocks.update({top: {"class": ABS}, left: {"class": ABS}, right: {"class": ABS}, bottom: {"class": SUM}})
+        link(links, source, f"{top}>num")
+        link(links, f"{top}<abs", f"{left}>num")
+        link(links, f"{top}<neg", f"{right}>num")
+        link(links, f"{left}<neg", f"{bottom}>nums")
+        link(links, f"{right}<neg", f"{bottom}>nums")
+        source = f"{bottom}<sum"
+    return {"blocks": blocks, "links": links}
+
+
+def random_dag(size: int, seed: int = 0, fanin: int = 3) -> dict[str, dict]:
+    """Sum blocks reading from two to `fanin` random blocks made before them."""
+    rng = random.Random(seed)
+    blocks = config("x", "y")
+    links = {}
+    sources = ["b0<x", "b0<y"]
+    for i in range(1, size + 1):
+        blocks[f"b{i}"] = {"class": SUM}
+        # A Sum needs at least two links, a single one is not gathered in a list
+        for output in rng.sample(sources, min(len(sources), rng.randint(2, fanin))):
+            link(links, output, f"b{i}>nums")
+        sources.append(f"b{i}<sum")
+    return {"blocks": blocks, "links": links}
+
+
+def cascade(size: int) -> dict[str, dict]:
+    """Abs blocks fed by the config, only running once the one before them ran."""
+    blocks = config("x")
+    links = {}
+    for i in range(1, size + 1):
+        blocks[f"b{i}"] = {"class": ABS}
+        link(links, "b0<x", f"b{i}>num")
+        if i > 1:
+            link(links, f"b{i-1}<runflag", f"b{i}>enabler")
+    return {"blocks": blocks, "links": links}
+
+
+GRAPHS = {
+    "chain": chain,
+    "fanin": fanin,
+    "diamond": diamond,
+    "random": random_dag,
+    "cascade": cascade,
+}
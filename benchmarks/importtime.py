@@ -0,0 +1,62 @@
+"""Import time of jabuti, as reported by `python -X importtime`.
+    
+    python -m benchmarks.importtime [repeat]
+"""
+import os
+import sys
+import subprocess
+
+
+
+STATEMENTS = {
+    "import jabuti": "import jabuti",
+    "RunSystem()": "import jabuti; jabuti.RunSystem()",
+    "jabuti.builtin": "import jabuti; jabuti.builtin.Abs()",
+}
+
+
+def import_times(statement: str) -> list[tuple[str, int, int]]:
+    """Every module imported by `statement`, with its depth and cumulative microseconds."""
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    times = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        times.append((name.strip(), depth, int(cumulative)))
+    return times
+
+
+def measure(statement: str, repeat: int = 5) -> dict[str, float]:
+    # The interpreter's own startup is left out
+    startup = {name for name, _, _ in import_times("pass")}
+    
+    runs = []
+    for _ in range(repeat):
+        times = [t for t in import_times(statement) if t[0] not in startup]
+        total = sum(us for _, depth, us in times if depth == 0)
+        runs.append((total, times))
+    
+    # Best of a few, the first ones also pay for filling the disk caches
+    total, times = min(runs, key=lambda run: run[0])
+    heaviest = sorted(
+        ((name, us) for name, _, us in times if not name.startswith("jabuti")),
+        key=lambda item: item[1], reverse=True,
+    )
+    return {
+        "ms": total / 1000,
+        "modules": len(times),
+        "heaviest": ', '.join(f"{name}:{us/1000:.1f}" for name, us in heaviest[:3]),
+    }
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for label, statement in STATEMENTS.items():
+        result = measure(statement, repeat)
+        print(f"{label: <16}: {result['ms']:7.1f} ms {result['modules']: >4} modules  ({result['heaviest']})")
@@ -0,0 +1,38 @@
+"""Memory taken by the core objects of a large synthetic graph.
+    
+    python -m benchmarks.memory [blocks]
+"""
+import gc
+import sys
+import tracemalloc
+import jabuti as jb
+from benchmarks.graphs import chain
+
+
+
+def measure(size: int) -> dict[str, float]:
+    flow = chain(size, flags=True)
+    runsys = jb.RunSystem()
+    
+    gc.collect()
+    tracemalloc.start()
+    runsys.setup(**flow)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    anchors = sum(len(block.inputs) + len(block.outputs) + 2 for block in runsys.blocks.values())
+    return {
+        "blocks": len(runsys.blocks),
+        "anchors": anchors,
+        "links": len(runsys.links),
+        "bytes": current,
+        "peak": peak,
+        "bytes/block": current / len(runsys.blocks),
+    }
+
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for key, value in measure(size).items():
+        print(f"{key: <12}: {value:,.0f}")
@@ -0,0 +1,162 @@
+"""Times the core engine on the synthetic flows of benchmarks.graphs.
+    
+    python -m benchmarks.suite [--graphs chain ...] [--sizes 10 ...] [--save PATH] [--compare PATH]
+
+Results are saved as json, by default under benchmarks/results named after the
+jabuti and python versions, and compared against an older file to catch what
+got slower between releases.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import jabuti as jb
+from benchmarks.graphs import GRAPHS
+
+
+
+SIZES = [10, 100, 1_000, 10_000, 100_000]
+TIMES = ["setup_ms", "run_ms", "export_ms", "from_file_ms"]
+RESULTS = os.path.join(os.path.dirname(__file__), "results")
+
+
+def best(function, repeat: int) -> float:
+    """Fastest of a few calls, in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def peak_memory(flow: dict[str, dict]) -> int:
+    """Most bytes allocated while setting up the flow and running it once."""
+    gc.collect()
+    tracemalloc.start()
+    runsys = jb.RunSystem()
+    runsys.setup(**flow)
+    runsys.run_loop()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def measure(graph: str, size: int, repeat: int = 3, memory: bool = True) -> dict[str, float]:
+    flow = GRAPHS[graph](size)
+    
+    # A new system every time, setting one up twice would link everything twice
+    systems = [jb.RunSystem() for _ in range(repeat)]
+    setup = best(lambda: systems.pop().setup(**flow), repeat)
+    runsys = jb.RunSystem()
+    runsys.setup(**flow)
+    
+    # The first run also compiles the plan, the best one is what runs cost after
+    run = best(runsys.run_loop, repeat + 1)
+    export = best(runsys._export, repeat)
+    
+    with tempfile.TemporaryDirectory() as temp:
+        path = os.path.join(temp, "flow.json")
+        with open(path, "w") as outjson:
+            json.dump(runsys._export(), outjson)
+        from_file = best(lambda: jb.RunSystem.from_file(path), repeat)
+    
+    result = {
+        "graph": graph,
+        "size": size,
+        "blocks": len(runsys.blocks),
+        "links": len(runsys.links),
+        "setup_ms": setup,
+        "run_ms": run,
+        "export_ms": export,
+        "from_file_ms": from_file,
+    }
+    if memory:
+        result["peak_mb"] = peak_memory(flow) / 2**20
+    return result
+
+
+def version() -> str:
+    import tomllib
+    
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "pyproject.toml")
+    with open(path, "rb") as intoml:
+        return tomllib.load(intoml)["project"]["version"]
+
+
+def compare(old: dict, new: dict, threshold: float = 1.25) -> list[str]:
+    """Times that grew more than `threshold` times since the old results."""
+    before = {(r["graph"], r["size"]): r for r in old["results"]}
+    slower = []
+    for result in new["results"]:
+        prev = before.get((result["graph"], result["size"]))
+        if prev is None:
+            continue
+        for name in [*TIMES, "peak_mb"]:
+            if name not in result or not prev.get(name):
+                continue
+            ratio = result[name] / prev[name]
+            if ratio > threshold:
+                slower.append(f"{result['graph']}:{result['size']} {name} {prev[name]:.3f} -> {result[name]:.3f} ({ratio:.2f}x)")
+    return slower
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks.suite", description=__doc__.splitlines()[0])
+    parser.add_argument("--graphs", nargs="+", choices=list(GRAPHS), default=list(GRAPHS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", default=False,
+        help="skip the peak memory, tracing allocations makes the large flows slow"
+    )
+    parser.add_argument("--save", metavar="PATH", help="where to write the results")
+    parser.add_argument("--compare", metavar="PATH", help="older results to compare with")
+    parser.add_argument("--threshold", type=float, default=1.25,
+        help="how many times slower counts as a regression"
+    )
+    args = parser.parse_args(argv)
+    
+    report = {
+        "version": version(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": [],
+    }
+    
+    print(f"{'graph': <8} {'size': >7} {'blocks': >7} {'links': >7}" + ''.join(f"{name: >14}" for name in [*TIMES, "peak_mb"]))
+    for graph in args.graphs:
+        for size in args.sizes:
+            result = measure(graph, size, args.repeat, not args.no_memory)
+            report["results"].append(result)
+            print(
+                f"{graph: <8} {size: >7} {result['blocks']: >7} {result['links']: >7}"
+                + ''.join(f"{result[name]: >14.3f}" for name in TIMES)
+                + (f"{result['peak_mb']: >14.3f}" if "peak_mb" in result else ""),
+                flush=True,
+            )
+    
+    save = args.save or os.path.join(RESULTS, f"{report['version']}-py{sys.version_info[0]}.{sys.version_info[1]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(save)), exist_ok=True)
+    with open(save, "w") as outjson:
+        json.dump(report, outjson, indent=2)
+    print(f"\nSaved to '{save}'")
+    
+    if args.compare is not None:
+        with open(args.compare) as injson:
+            slower = compare(json.load(injson), report, args.threshold)
+        print(f"\n{len(slower)} regressions against '{args.compare}'")
+        for line in slower:
+            print(f"  {line}")
+        return 1 if slower else 0
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,5 +4,29 @@ from jabuti.core.group import Group
 from jabuti.core.anchor import Anchor, Input, Output
 from jabuti.core.runsys import RunSystem
 
-# import jabuti.utils as utils
-import jabuti.builtin as builtin
+# Only imported on first use, a headless run never pays for what it doesn't touch
+_lazy: dict[str, tuple[str, str | None]] = {
+    "builtin": ("jabuti.builtin", None),
+    "utils": ("jabuti.utils", None),
+    "gui": ("jabuti.gui", None),
+    "ResultCache": ("jabuti.core.cache", "ResultCache"),
+    "DiskCache": ("jabuti.core.cache", "DiskCache"),
+    "Monitor": ("jabuti.core.monitor", "Monitor"),
+}
+
+
+def __getattr__(name: str):
+    if name not in _lazy:
+        raise AttributeError(f"module 'jabuti' has no attribute '{name}'")
+    
+    import importlib
+    module_name, attr = _lazy[name]
+    value = importlib.import_module(module_name)
+    if attr is not None:
+        value = getattr(value, attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_lazy])
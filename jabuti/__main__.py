@@ -1,3 +1,4 @@
+import os
 import argparse
 
 
@@ -7,6 +8,12 @@ class ArgsTypes:
     gui: bool
     log: bool
     file: str | None
+    repeat: int
+    warmup: int
+    executor: str
+    json_stats: bool
+    sizes: bool
+    trace: str | None
 
 
 
@@ -18,9 +25,27 @@ parser.add_argument("-g", "--gui", action="store_true", default=False,
     help="open the graphical interface"
 )
 parser.add_argument("-l", "--log", action="store_true", default=False,
-    help="log the execution steps"
+    help="time every block and report them after running"
+)
+parser.add_argument("-f", "--file", help="relative file path, json, toml or binary flow (jbf)")
+parser.add_argument("--repeat", type=int, default=1, metavar="N",
+    help="how many timed runs to execute"
+)
+parser.add_argument("--warmup", type=int, default=0, metavar="N",
+    help="runs to execute before timing, not reported"
+)
+parser.add_argument("--executor", choices=["serial", "threads", "processes"], default="serial",
+    help="where the blocks run"
+)
+parser.add_argument("--json-stats", action="store_true", default=False,
+    help="print the timing report as json"
+)
+parser.add_argument("--sizes", action="store_true", default=False,
+    help="also report the bytes in and out of every block, pickling them slows the runs"
+)
+parser.add_argument("--trace", metavar="PATH",
+    help="write the block spans of the runs as a trace file, for Perfetto"
 )
-parser.add_argument("-f", "--file", help="relative file path, json or toml")
 
 args: ArgsTypes = parser.parse_args()
 
@@ -36,11 +61,49 @@ if args.run and args.file is None:
     parser.print_help()
     exit()
 
-import jabuti as jb
+# Command to run has a file that does not exist
+if args.file is not None and not os.path.isfile(args.file):
+    print(f"\033[31mFile '{args.file}' not found\033[39m\n")
+    exit(1)
+
+# Jabuti itself is only imported by the action that needs it, so a wrong
+# command line gets its answer without paying for the import
 
 # Runs the file on the background
 if args.run and args.file is not None:
-    print(f"\033[32mExecuting the file '{args.file}'\033[39m")
+    import json
+    import time
+    from jabuti.core.runsys import RunSystem
+    from jabuti.utils.timing import summarize, time_runs
+    
+    if not args.json_stats:
+        print(f"\033[32mExecuting the file '{args.file}'\033[39m")
+    
+    start = time.perf_counter()
+    runsys = RunSystem.from_file(args.file)
+    load = time.perf_counter() - start
+    if runsys is None:
+        exit(1)
+    
+    if args.log or args.trace is not None:
+        from jabuti.core.monitor import Monitor
+        runsys.set_monitor(Monitor(sizes=args.log and args.sizes, trace=args.trace is not None))
+    
+    samples = time_runs(runsys, args.repeat, args.warmup, args.executor)
+    stats = {"file": args.file, "executor": args.executor, "load_ms": load * 1000}
+    stats.update(summarize(samples))
+    if args.trace is not None:
+        runsys.export_trace(args.trace)
+    
+    if args.json_stats:
+        if args.log:
+            stats["profile"] = runsys.monitor.report()
+        print(json.dumps(stats, indent=2))
+    else:
+        for k, v in stats.items():
+            print(f"{k: <12}: {v:.3f}" if isinstance(v, float) else f"{k: <12}: {v}")
+        if args.log:
+            print(f"\n{runsys.monitor.format()}")
     exit()
 
 # Opens the GUI
@@ -4,6 +4,8 @@ from jabuti.core.block import AutoBlock
 
 class If(AutoBlock):
     """A -> True, False"""
+    __slots__ = ()
+    
     def __init__(self) -> None:
         def func(flag: bool):
             return flag, not flag
@@ -11,6 +13,8 @@ class If(AutoBlock):
 
 class Cmp(AutoBlock):
     """A, B -> A==B, A!=B, A<B, A<=B, A>B, A>=B"""
+    __slots__ = ()
+    
     def __init__(self) -> None:
         def func(x: float, y: float):
             return x==y, x!=y, x<y, x<=y, x>y, x>=y
@@ -4,4 +4,4 @@ from jabuti.core.block import BlockConfig
 
 # Just here to make the Config block scope be outside the core
 class Config(BlockConfig):
-    pass
+    __slots__ = ()
@@ -10,6 +10,8 @@ from jabuti.core.block import AutoBlock
 
 class Sum(AutoBlock):
     """A... -> A1+A2+..."""
+    __slots__ = ()
+    
     def __init__(self) -> None:
         def func(nums: list[float]):
             return sum(nums)
@@ -17,6 +19,8 @@ class Sum(AutoBlock):
 
 class Mult(AutoBlock):
     """A... -> A1*A2*..."""
+    __slots__ = ()
+    
     def __init__(self) -> None:
         def func(nums: list[float]):
             res = 1
@@ -27,6 +31,9 @@ class Mult(AutoBlock):
 
 class Div(AutoBlock):
     """A, B -> A/B, A//B, A%B"""
+    vectorized = True
+    __slots__ = ()
+    
     def __init__(self) -> None:
         def func(num: float, den: float):
             return num / den, num // den, num % den
@@ -34,6 +41,9 @@ class Div(AutoBlock):
 
 class Inv(AutoBlock):
     """A -> 1/A"""
+    vectorized = True
+    __slots__ = ()
+    
     def __init__(self) -> None:
         def func(num: float):
             return 1 / num
@@ -46,6 +56,9 @@ class Inv(AutoBlock):
 
 class Abs(AutoBlock):
     """A -> |A|, -|A|"""
+    vectorized = True
+    __slots__ = ()
+    
     def __init__(self) -> None:
         def func(num: float):
             abs_num = abs(num)
@@ -54,6 +67,9 @@ class Abs(AutoBlock):
 
 class Pow(AutoBlock):
     """A, B -> A^B"""
+    vectorized = True
+    __slots__ = ()
+    
     def __init__(self) -> None:
         def func(num: float, exp: float):
             return num ** exp
@@ -61,6 +77,9 @@ class Pow(AutoBlock):
 
 class Sqrt(AutoBlock):
     """A -> sqrt(A)"""
+    vectorized = True
+    __slots__ = ()
+    
     def __init__(self) -> None:
         def func(num: float):
             return num ** 0.5
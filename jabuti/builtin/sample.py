@@ -3,24 +3,35 @@ from jabuti.core.block import AutoBlock
 
 
 class BlockSum(AutoBlock):
+    __slots__ = ()
+    
     def __init__(self) -> None:
         def func(nums: list):
             return sum(nums)
         super().__init__(func, {"sum": float})
 
 class BlockAdd(AutoBlock):
+    vectorized = True
+    __slots__ = ()
+    
     def __init__(self) -> None:
         def func(num1: float, num2: float):
             return num1 + num2
         super().__init__(func, {"sum": float})
 
 class BlockDiv(AutoBlock):
+    vectorized = True
+    __slots__ = ()
+    
     def __init__(self) -> None:
         def func(num: float, div: float):
             return num / div
         super().__init__(func, {"result": float})
 
 class BlockInv(AutoBlock):
+    vectorized = True
+    __slots__ = ()
+    
     def __init__(self) -> None:
         def func(num: float):
             return -num
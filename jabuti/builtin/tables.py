@@ -4,6 +4,8 @@ from jabuti.core.block import AutoBlock
 
 
 class BlockUnion(AutoBlock):
+    __slots__ = ()
+    
     def __init__(self, name: str) -> None:
         def func(df1: pd.DataFrame, df2: pd.DataFrame):
             return pd.concat((df1, df2), ignore_index=True)
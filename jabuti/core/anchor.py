@@ -6,6 +6,9 @@ if TYPE_CHECKING:
 
 
 class Anchor:
+    # Graphs can hold many thousands of anchors, no __dict__ for each of them
+    __slots__ = ("name", "type", "vtype", "value", "block", "links", "status", "armed")
+    
     def __init__(self,
             block: "Block",
             name: str,
@@ -18,9 +21,13 @@ class Anchor:
         self.vtype: str = vtype
         self.value: Any = value
         self.block: "Block" = block
-        self.links: list["Link"] = []
+        # Ordered by arrival, a dict so big fan-ins add and remove in O(1)
+        self.links: dict["Link", None] = {}
         self.status: bool = False
         
+        # Still counted as missing by its block while a ready queue is running
+        self.armed: bool = False
+        
         if value is not None:
             self.status = True
     
@@ -30,6 +37,8 @@ class Anchor:
         return f"(anchor) name:{self.name} {_type} {_vals}"
     
     def rmv(self) -> None:
+        if self.block is not None:
+            self.block.rmv_anchor(self)
         self.block = None
     
     def reset(self) -> None:
@@ -39,44 +48,80 @@ class Anchor:
     def add_link(self, link: "Link") -> None:
         if link in self.links:
             return
-        self.links.append(link)
+        self.links[link] = None
+        if self.block is not None:
+            self.block.add_link(link)
     
     def rmv_link(self, link: "Link") -> None:
         if link not in self.links:
             return
-        self.links.remove(link)
+        del self.links[link]
+        if self.block is not None:
+            self.block.rmv_link(link)
 
 
 class Input(Anchor):
-    def check(self):
+    __slots__ = ("ready",)
+    
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # Links already set on a fan-in, None until the next full look
+        self.ready: set["Link"] = None
+    
+    def reset(self) -> None:
+        super().reset()
+        self.ready = None
+    
+    def rmv_link(self, link: "Link") -> None:
+        super().rmv_link(link)
+        if self.ready is not None:
+            self.ready.discard(link)
+    
+    def check(self, link: "Link" = None):
         if not self.links:
             self.status = False
             return
         
-        for link in self.links:
+        if len(self.links) == 1:
+            link = next(iter(self.links))
             if not link.get_status():
                 return
+            self.value = link.get_value()
+            self.status = True
+            return
         
-        if len(self.links) == 1:
-            self.value = self.links[0].get_value()
+        # Told by a single link, the others are only looked at once all arrived
+        if link is not None and self.ready is not None:
+            if link.get_status():
+                self.ready.add(link)
+            else:
+                self.ready.discard(link)
+            if len(self.ready) < len(self.links):
+                return
         
-        else:
-            self.type = list
-            values = []
-            for link in self.links:
-                value = link.get_value()
-                if not isinstance(value, (list, set, tuple)):
-                    value = [value]
-                values.extend(value)
-            self.value = values
-            
-            if self.vtype == "flag":
-                self.value = all(self.value)
+        # Outputs can be reset without telling, so the count is confirmed here
+        self.ready = {link for link in self.links if link.get_status()}
+        if len(self.ready) < len(self.links):
+            return
+        
+        self.type = list
+        values = []
+        for link in self.links:
+            value = link.get_value()
+            if not isinstance(value, (list, set, tuple)):
+                value = [value]
+            values.extend(value)
+        self.value = values
+        
+        if self.vtype == "flag":
+            self.value = all(self.value)
         
         self.status = True
 
 
 class Output(Anchor):
+    __slots__ = ()
+    
     def set(self, value: Any) -> None:
         self.value = value
         self.status = True
@@ -1,11 +1,60 @@
+import types
 import typing
 import inspect
-from jabuti.core.link import Link
+import collections
+from jabuti.core.link import Link, deferred
 from jabuti.core.anchor import Anchor, Input, Output
+if typing.TYPE_CHECKING:
+    from jabuti.core.cache import ResultCache, DiskCache
+    from jabuti.core.monitor import Monitor
+    from jabuti.core.runsys import RunSystem
 
 
 
+# Inputs read from the signature of each code object, with the annotations they
+# came from: builtin blocks define the same function again for every instance
+_signatures: dict[types.CodeType, tuple[dict[str, any], list[tuple[str, type]]]] = {}
+
+
+def signature_inputs(function: typing.Callable) -> list[tuple[str, type]]:
+    """Name and type of every parameter of `function`, as AutoBlock inputs."""
+    # Only plain functions, the signature of anything else may not be its code's
+    plain = isinstance(function, types.FunctionType) and not (
+        hasattr(function, "__wrapped__") or hasattr(function, "__signature__")
+    )
+    if plain:
+        cached = _signatures.get(function.__code__)
+        if cached is not None and cached[0] == function.__annotations__:
+            return cached[1]
+    
+    inputs = []
+    for param in inspect.signature(function).parameters.values():
+        _type = param.annotation
+        if _type == inspect._empty:
+            if param.kind == inspect._ParameterKind.VAR_POSITIONAL:
+                _type = list
+            elif param.kind == inspect._ParameterKind.VAR_KEYWORD:
+                _type = dict
+            else:
+                _type = any
+        inputs.append((param.name, _type))
+    
+    if plain:
+        _signatures[function.__code__] = (dict(function.__annotations__), inputs)
+    return inputs
+
+
 class Block:
+    # The function also works element-wise on arrays, see RunSystem.sweep
+    vectorized: bool = False
+    
+    # Subclasses without their own __slots__ still get a __dict__
+    __slots__ = (
+        "idf", "name", "status", "result", "function", "init_args", "cache",
+        "pending", "ready_queue", "inputs", "outputs", "enabler", "runflag",
+        "anchors", "links", "monitor", "systems",
+    )
+    
     def __init__(self,
             function: typing.Callable = None,
             inputs: list[Input] = None,
@@ -17,9 +66,26 @@ class Block:
         self.result: any = None
         self.function: typing.Callable = function
         
+        # Constructor arguments when built by a RunSystem, part of the cache key
+        self.init_args: tuple[tuple, dict[str, any]] = None
+        self.cache: "ResultCache | DiskCache" = None
+        self.monitor: "Monitor" = None
+        
+        # Event driven scheduling: inputs still missing and where to go when none
+        self.pending: int = 0
+        self.ready_queue: collections.deque["Block"] = None
+        
         self.inputs: dict[str, Input] = {}
         self.outputs: dict[str, Output] = {}
         
+        # Kept up to date as anchors and links come and go, used as ordered sets
+        self.anchors: dict[Anchor, None] = {}
+        self.links: dict[Link, None] = {}
+        
+        # RunSystems holding this block, told of every link made or dropped here
+        # so they spot a stale plan or index without looking at every block
+        self.systems: dict["RunSystem", None] = {}
+        
         if inputs is not None:
             self.register_inputs(inputs)
         
@@ -29,6 +95,8 @@ class Block:
         # Creates the specific flow controlling IOs
         self.enabler: Input = Input(self, "enabler", bool, True, "flag")
         self.runflag: Output = Output(self, "runflag", bool, False, "flag")
+        self.add_anchor(self.enabler)
+        self.add_anchor(self.runflag)
     
     def __repr__(self) -> str:
         info = [
@@ -45,27 +113,25 @@ class Block:
         tag, name = item[0], item[1:]
         match tag:
             case '>':
+                if name == "enabler" and name not in self.inputs:
+                    return self.enabler
                 return self.inputs.get(name, None)
             case '<':
+                if name == "runflag" and name not in self.outputs:
+                    return self.runflag
                 return self.outputs.get(name, None)
             case _:
                 print(f"Anchor {name} does not exist")
     
     @property
-    def anchors(self) -> list["Anchor"]:
-        anchors: list["Anchor"] = []
-        if self.inputs  is not None: anchors.extend(self.inputs.values())
-        if self.outputs is not None: anchors.extend(self.outputs.values())
-        if self.enabler is not None: anchors.append(self.enabler)
-        if self.runflag is not None: anchors.append(self.runflag)
-        return anchors
+    def is_async(self) -> bool:
+        return inspect.iscoroutinefunction(self.function)
     
-    @property
-    def links(self) -> list["Link"]:
-        links: list["Link"] = []
-        for anchor in self.anchors:
-            links.extend(anchor.links)
-        return links
+    def iter_inputs(self) -> typing.Iterator[Input]:
+        """Every input, the enabler last, even those not in `anchors` yet."""
+        yield from self.inputs.values()
+        if self.enabler is not None:
+            yield self.enabler
     
     def _size(self) -> int:
         return max(len(self.inputs), len(self.outputs))
@@ -102,17 +168,92 @@ class Block:
         self.enabler.check()
         return self.check_inputs() and self.enabler.value
     
+    def arm(self, ready_queue: collections.deque["Block"]) -> None:
+        """Counts the unsatisfied inputs, the block is queued once all arrive."""
+        self.ready_queue = ready_queue
+        self.pending = 0
+        
+        watched = list(self.inputs.values())
+        if self.enabler is not None and self.enabler.links:
+            watched.append(self.enabler)
+        
+        for input in watched:
+            # The enabler is never reset, its status may be left from an old run
+            input.status = False
+            input.check()
+            input.armed = not input.status
+            self.pending += input.armed
+        
+        if not self.pending:
+            ready_queue.append(self)
+    
+    def disarm(self) -> None:
+        self.ready_queue = None
+        self.pending = 0
+        for input in self.inputs.values():
+            input.armed = False
+        if self.enabler is not None:
+            self.enabler.armed = False
+    
+    def satisfy(self, input: Input) -> None:
+        if not input.armed or not input.status:
+            return
+        input.armed = False
+        self.pending -= 1
+        if not self.pending:
+            self.ready_queue.append(self)
+    
+    def add_anchor(self, anchor: Anchor) -> None:
+        anchor.block = self
+        self.anchors[anchor] = None
+        for link in anchor.links:
+            self.links[link] = None
+            self.edited()
+    
+    def rmv_anchor(self, anchor: Anchor) -> None:
+        self.anchors.pop(anchor, None)
+        anchors = self.inputs if isinstance(anchor, Input) else self.outputs
+        if anchors.get(anchor.name) is anchor:
+            del anchors[anchor.name]
+        for link in anchor.links:
+            self.rmv_link(link)
+    
+    def edited(self) -> None:
+        for system in self.systems:
+            system.edits += 1
+    
+    def add_link(self, link: Link) -> None:
+        self.edited()
+        # Anchors put straight into inputs or outputs are only known once linked
+        for anchor in (link.backref, link.nextref):
+            if anchor.block is self and anchor not in self.anchors:
+                self.anchors[anchor] = None
+        if link.backref in self.anchors or link.nextref in self.anchors:
+            self.links[link] = None
+    
+    def rmv_link(self, link: Link) -> None:
+        self.edited()
+        # A link between two anchors of this block stays until both let it go
+        for anchor in (link.backref, link.nextref):
+            if anchor in self.anchors and link in anchor.links:
+                return
+        self.links.pop(link, None)
+    
     def register_inputs(self, inputs: list[Input]) -> None:
         for input in inputs:
             # print(f"Block '{self.name}' registered Input '{_input.name}'")
-            input.block = self
+            if input.name in self.inputs:
+                self.rmv_anchor(self.inputs[input.name])
             self.inputs[input.name] = input
+            self.add_anchor(input)
     
     def register_outputs(self, outputs: list[Output]) -> None:
         for output in outputs:
             # print(f"Block '{self.name}' registered Output '{_output.name}'")
-            output.block = self
+            if output.name in self.outputs:
+                self.rmv_anchor(self.outputs[output.name])
             self.outputs[output.name] = output
+            self.add_anchor(output)
     
     def check_inputs(self) -> None:
         if not self.inputs: # ConfigBlock
@@ -124,71 +265,128 @@ class Block:
                 return False
         return True
     
-    def check_outputs(self) -> None:
-        if not self.status:
-            # print(f"Block did not run")
-            return
-        
+    def map_result(self, result: any) -> dict[str, any]:
+        """Matches a function result with the names of the outputs."""
         if not len(self.outputs):
             # print(f"No outputs to set")
-            return
+            return {}
         
         # The result is simple: a scalar with only one output
-        if not isinstance(self.result, (dict, tuple)) and len(self.outputs) == 1:
-            list(self.outputs.values())[0].set(self.result)
-            return
+        if not isinstance(result, (dict, tuple)) and len(self.outputs) == 1:
+            return {next(iter(self.outputs)): result}
         
         # The result is named: a dict matching the outputs 
-        if isinstance(self.result, (dict)):
-            for k, v in self.result.items():
-                # print(f"Matching {k=} ... ", end='')
-                if k not in self.outputs:
-                    # print(f"does not exist in the outputs")
-                    continue
-                self.outputs[k].set(v)
-                # print(f"matched!")
-            return
+        if isinstance(result, (dict)):
+            # Names that do not exist in the outputs are dropped
+            return {k: v for k, v in result.items() if k in self.outputs}
         
         # The result is ordered: a tuple matching the outputs order
-        if isinstance(self.result, (tuple)):
-            for value, output in zip(self.result, self.outputs.values()):
-                output.set(value)
-            return
+        if isinstance(result, (tuple)):
+            return dict(zip(self.outputs, result))
         
         print(f"For some reason could not map the result to the outputs.")
+        return {}
     
-    def run(self) -> None:
+    def check_outputs(self) -> None:
+        if not self.status:
+            # print(f"Block did not run")
+            return
+        
+        for name, value in self.map_result(self.result).items():
+            self.outputs[name].set(value)
+    
+    def prepare(self) -> dict[str, any] | None:
+        """Resets the block and gathers its parameters, None if it can't run."""
         self.reset()
         self.enabler.check()
         if not self.enabler.value:
             # print(f"The block '{self.name}' is disabled")
-            return
+            return None
         
         if self.function is None:
             # print(f"There is no function")
-            return
+            return None
         
         if not self.check_inputs():
             # print(f"Not all inputs are ready")
-            return
+            return None
         
-        params = {i.name: i.value for i in self.inputs.values()}
-        self.result = self.function(**params)
+        return {i.name: i.value for i in self.inputs.values()}
+    
+    def call(self, params: dict[str, any]) -> any:
+        result = self.function(**params)
+        if inspect.iscoroutine(result):
+            import asyncio
+            # Outside of an event loop the coroutine gets one of its own
+            result = asyncio.run(result)
+        return result
+    
+    def execute(self, params: dict[str, any]) -> any:
+        """Only calls the function, safe to be done outside of the main thread."""
+        if self.monitor is not None:
+            start = self.monitor.start()
+        
+        if self.cache is None:
+            result = self.call(params)
+        else:
+            key = self.cache.key(self, params)
+            hit, result = self.cache.get(key)
+            if not hit:
+                result = self.call(params)
+                self.cache.put(key, result)
+        
+        if self.monitor is not None:
+            self.monitor.stop(self, start, params, result)
+        return result
+    
+    async def execute_async(self, params: dict[str, any]) -> any:
+        # The cpu time also counts the tasks that ran while this one awaited
+        if self.monitor is not None:
+            start = self.monitor.start()
+        
+        hit = False
+        if self.cache is not None:
+            key = self.cache.key(self, params)
+            hit, result = self.cache.get(key)
+        
+        if not hit:
+            result = self.function(**params)
+            if inspect.isawaitable(result):
+                result = await result
+            if self.cache is not None:
+                self.cache.put(key, result)
+        
+        if self.monitor is not None:
+            self.monitor.stop(self, start, params, result)
+        return result
+    
+    def finish(self, result: any) -> None:
+        self.result = result
         self.status = True
         self.check_outputs()
         self.runflag.set(True)
+    
+    def run(self) -> None:
+        params = self.prepare()
+        if params is None:
+            return
+        self.finish(self.execute(params))
 
 
 class BlockConfig(Block):
     """Special block that only has outputs"""
+    __slots__ = ()
+    
     def __init__(self, values: dict[str, any]) -> None:
         super().__init__()
         self.result = values
         for k, v in values.items():
             output = Output(self, k, type(v))
             output.set(v)
-            self.outputs[k] = output
+            self.register_outputs([output])
         self.status: bool = True
+        self.rmv_anchor(self.enabler)
+        self.rmv_anchor(self.runflag)
         self.enabler = None
         self.runflag = None
     
@@ -204,6 +402,16 @@ class BlockConfig(Block):
     def reset(self) -> None:
         pass
     
+    def update(self, values: dict[str, any]) -> None:
+        """Changes the values of existing outputs, linked inputs are told."""
+        with deferred():
+            for k, v in values.items():
+                if k not in self.outputs:
+                    print(f"Output '{k}' does not exist")
+                    continue
+                self.outputs[k].set(v)
+        self.result = {k: o.value for k, o in self.outputs.items()}
+    
     def run(self) -> None:
         self.status = True
         self.check_outputs()
@@ -211,6 +419,8 @@ class BlockConfig(Block):
 
 class AutoBlock(Block):
     """Uses the inspect.signature to fill out necessary parameters."""
+    __slots__ = ()
+    
     def __init__(self,
             function: typing.Callable,
             outputs: dict[str, type] | list[str] = None,
@@ -218,22 +428,10 @@ class AutoBlock(Block):
         ) -> None:
         super().__init__(function)
         
-        for param in inspect.signature(function).parameters.values():
-            name = param.name
-            _type = _type = param.annotation
-            if _type == inspect._empty:
-                if param.kind == inspect._ParameterKind.VAR_POSITIONAL:
-                    _type = list
-                elif param.kind == inspect._ParameterKind.VAR_KEYWORD:
-                    _type = dict
-                else:
-                    _type = any
-            self.inputs[name] = Input(self, name, _type)
+        self.register_inputs([Input(self, name, _type) for name, _type in signature_inputs(function)])
         
         if outputs is not None:
             if flag:
-                for name in outputs:
-                    self.outputs[name] = Output(self, name, bool, False, "flag")
+                self.register_outputs([Output(self, name, bool, False, "flag") for name in outputs])
             else:
-                for name, _type in outputs.items():
-                    self.outputs[name] = Output(self, name, _type, vtype="value")
+                self.register_outputs([Output(self, name, _type, vtype="value") for name, _type in outputs.items()])
@@ -0,0 +1,332 @@
+import os
+import sys
+import types
+import shutil
+import pickle
+import hashlib
+import threading
+import collections
+from typing import Any, TYPE_CHECKING
+if TYPE_CHECKING:
+    from jabuti.core.block import Block
+
+
+
+# Digest of every code object met so far, builtin blocks share theirs
+_code_digests: dict[types.CodeType, str] = {}
+
+# Modules of the functions and classes each code object reads as globals
+_code_modules: dict[types.CodeType, set[str]] = {}
+
+# Digest of every source file met so far, with the mtime and size it had
+_file_digests: dict[str, tuple[int, int, str]] = {}
+
+
+def code_identity(code: types.CodeType) -> tuple:
+    """The instructions, constants and names of the code, nested code included."""
+    consts = []
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            const = code_identity(const)
+        elif isinstance(const, frozenset): # Iterated in hash order, not stable
+            const = ("frozenset", tuple(sorted(map(repr, const))))
+        consts.append(const)
+    return (code.co_code, tuple(consts), code.co_names, code.co_varnames, code.co_freevars)
+
+
+def code_digest(code: types.CodeType) -> str:
+    if code not in _code_digests:
+        data = pickle.dumps(code_identity(code), pickle.HIGHEST_PROTOCOL)
+        _code_digests[code] = hashlib.blake2b(data, digest_size=16).hexdigest()
+    return _code_digests[code]
+
+
+def global_names(code: types.CodeType) -> set[str]:
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names.update(global_names(const))
+    return names
+
+
+def source_modules(block: "Block") -> set[str]:
+    """Modules defining the block, its function and the functions it calls."""
+    function = block.function
+    if isinstance(function, types.MethodType):
+        function = function.__func__
+    modules = {type(block).__module__, getattr(function, "__module__", None)}
+    
+    code = getattr(function, "__code__", None)
+    if code is None:
+        return modules
+    if code not in _code_modules:
+        found = set()
+        for name in global_names(code):
+            value = function.__globals__.get(name)
+            if isinstance(value, (types.FunctionType, type)):
+                found.add(value.__module__)
+            elif isinstance(value, types.ModuleType):
+                found.add(value.__name__)
+        _code_modules[code] = found
+    return modules | _code_modules[code]
+
+
+def file_digest(path: str) -> str | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    cached = _file_digests.get(path)
+    if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+        from jabuti.utils.finder import file_hash
+        cached = (stat.st_mtime_ns, stat.st_size, file_hash(path))
+        _file_digests[path] = cached
+    return cached[2]
+
+
+def source_digest(block: "Block") -> str:
+    """Digest of the source files behind the block, constants and helpers included."""
+    paths = set()
+    for name in source_modules(block):
+        path = getattr(sys.modules.get(name), "__file__", None)
+        if path is not None:
+            paths.add(path)
+    return ''.join(f"{path}:{file_digest(path)}" for path in sorted(paths))
+
+
+def function_identity(function: Any, captured: bool = True) -> tuple:
+    """What the function computes, with the values it captured if `captured`."""
+    if isinstance(function, types.MethodType):
+        inner = function_identity(function.__func__, captured)
+        return (inner, function.__self__) if captured else inner
+    
+    code = getattr(function, "__code__", None)
+    if code is None:
+        # Builtins, partials and callable objects are pickled as they are
+        return (getattr(function, "__qualname__", None), function if captured else None)
+    
+    identity = (getattr(function, "__qualname__", None), code_digest(code))
+    if not captured:
+        return identity
+    cells = tuple(cell.cell_contents for cell in function.__closure__ or ())
+    return (*identity, function.__defaults__, function.__kwdefaults__, cells)
+
+
+def block_identity(block: "Block", captured: bool = True) -> tuple:
+    """What makes two blocks compute the same thing given the same inputs."""
+    return (
+        f"{block.__module__}.{block.name}",
+        function_identity(block.function, captured),
+        block.init_args,
+    )
+
+
+def result_key(block: "Block", params: dict[str, Any], captured: bool = True) -> str | None:
+    try:
+        data = pickle.dumps((block_identity(block, captured), params), pickle.HIGHEST_PROTOCOL)
+    except Exception: # Inputs or captured values that can't be hashed are never cached
+        return None
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """Keeps the latest block results in memory, least recently used go first."""
+    def __init__(self, max_items: int = 1024, max_bytes: int = None) -> None:
+        self.max_items: int = max_items
+        self.max_bytes: int = max_bytes
+        self.entries: collections.OrderedDict[str | tuple, tuple[Any, int]] = collections.OrderedDict()
+        self.size: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.lock: threading.Lock = threading.Lock()
+    
+    def __repr__(self) -> str:
+        stats = ' '.join(f"{k}:{v}" for k, v in self.stats().items())
+        return f"(cache) {stats}"
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def key(self, block: "Block", params: dict[str, Any]) -> str | tuple | None:
+        digest = result_key(block, params)
+        if digest is not None:
+            return digest
+        
+        # Captured values that can't be pickled, like a bound self: in memory
+        # the function object itself tells such blocks apart
+        digest = result_key(block, params, captured=False)
+        if digest is None:
+            return None
+        return (block.function, digest)
+    
+    def get(self, key: str | tuple | None) -> tuple[bool, Any]:
+        with self.lock:
+            if key is None or key not in self.entries:
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, self.entries[key][0]
+    
+    def put(self, key: str | tuple | None, result: Any) -> None:
+        if key is None:
+            return
+        
+        try:
+            size = len(pickle.dumps(result, pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            size = sys.getsizeof(result)
+        
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+            self.entries[key] = (result, size)
+            self.size += size
+            self.evict()
+    
+    def evict(self) -> None:
+        while self.entries and (
+                (self.max_items is not None and len(self.entries) > self.max_items)
+                or (self.max_bytes is not None and self.size > self.max_bytes)
+            ):
+            _, (_, size) = self.entries.popitem(last=False)
+            self.size -= size
+    
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+    
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "items": len(self.entries),
+            "bytes": self.size,
+        }
+
+
+class DiskCache:
+    """Stores block results as files named by their key, shared across processes."""
+    def __init__(self, path: str = None, max_bytes: int = 1 << 30) -> None:
+        if path is None:
+            path = os.path.join(os.path.expanduser("~"), ".cache", "jabuti")
+        self.path: str = path
+        self.max_bytes: int = max_bytes
+        self.hits: int = 0
+        self.misses: int = 0
+        self.lock: threading.Lock = threading.Lock()
+        
+        os.makedirs(self.path, exist_ok=True)
+        self.size: int = sum(size for _, size, _ in self.files())
+    
+    def __repr__(self) -> str:
+        stats = ' '.join(f"{k}:{v}" for k, v in self.stats().items())
+        return f"(diskcache) path:{self.path} {stats}"
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self.files())
+    
+    def files(self) -> list[tuple[str, int, float]]:
+        """Every stored result as (path, size, last use)."""
+        found = []
+        for root, _, files in os.walk(self.path):
+            for file in files:
+                if not file.endswith(".pkl"):
+                    continue
+                file_path = os.path.join(root, file)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError: # Evicted by another process
+                    continue
+                found.append((file_path, stat.st_size, stat.st_mtime))
+        return found
+    
+    def key(self, block: "Block", params: dict[str, Any]) -> str | None:
+        digest = result_key(block, params)
+        if digest is None:
+            return None
+        
+        # The code alone misses the globals it reads, like a constant or a
+        # helper edited in its module, so the source files are hashed too
+        data = f"{digest}:{source_digest(block)}".encode()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        # Grouped by class, so a whole class can be invalidated at once
+        return f"{block.__module__}.{block.name}/{digest}"
+    
+    def get(self, key: str | None) -> tuple[bool, Any]:
+        file_path = os.path.join(self.path, f"{key}.pkl")
+        try:
+            with open(file_path, "rb") as inpkl:
+                result = pickle.load(inpkl)
+            os.utime(file_path) # Recently used, last to be evicted
+        except Exception:
+            with self.lock:
+                self.misses += 1
+            return False, None
+        
+        with self.lock:
+            self.hits += 1
+        return True, result
+    
+    def put(self, key: str | None, result: Any) -> None:
+        if key is None:
+            return
+        
+        try:
+            data = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+        
+        if len(data) > self.max_bytes:
+            return
+        
+        file_path = os.path.join(self.path, f"{key}.pkl")
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        
+        # Written aside and moved, readers never see half a file
+        temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as outpkl:
+            outpkl.write(data)
+        os.replace(temp_path, file_path)
+        
+        with self.lock:
+            self.size += len(data)
+            if self.size > self.max_bytes:
+                self.evict()
+    
+    def evict(self) -> None:
+        files = sorted(self.files(), key=lambda f: f[2])
+        self.size = sum(size for _, size, _ in files)
+        for file_path, size, _ in files:
+            if self.size <= self.max_bytes:
+                break
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            self.size -= size
+    
+    def invalidate(self, block_class: str | type) -> None:
+        """Drops every result of a class, given as a type or its full path."""
+        if isinstance(block_class, type):
+            block_class = f"{block_class.__module__}.{block_class.__name__}"
+        with self.lock:
+            shutil.rmtree(os.path.join(self.path, block_class), ignore_errors=True)
+            self.size = sum(size for _, size, _ in self.files())
+    
+    def clear(self) -> None:
+        with self.lock:
+            shutil.rmtree(self.path, ignore_errors=True)
+            os.makedirs(self.path, exist_ok=True)
+            self.size = 0
+    
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes": self.size,
+        }
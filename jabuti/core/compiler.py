@@ -0,0 +1,323 @@
+from typing import Any, Callable, TYPE_CHECKING
+from jabuti.core.block import Block, BlockConfig
+from jabuti.core.anchor import Output
+from jabuti.core.stream import SKIP, gather, upstream
+if TYPE_CHECKING:
+    from jabuti.core.runsys import RunSystem
+
+
+
+def unpack(result: Any, size: int) -> tuple:
+    """Slow path of the generated mapping, for results that don't fit exactly."""
+    if isinstance(result, tuple):
+        return (result + (SKIP,) * size)[:size]
+    print(f"For some reason could not map the result to the outputs.")
+    return (SKIP,) * size
+
+
+class FlowSource:
+    """Python source of a flow, along with the objects its names refer to."""
+    def __init__(self, name: str) -> None:
+        self.name: str = name
+        self.lines: list[str] = []
+        self.blocks: dict[str, Block] = {}
+        self.constants: dict[str, Any] = {}
+        self.params: list[str | Output] = []
+        self.outputs: list[str | Output] = []
+    
+    @property
+    def code(self) -> str:
+        return '\n'.join(self.lines) + '\n'
+    
+    def namespace(self) -> dict[str, Any]:
+        names = {"SKIP": SKIP, "gather": gather, "unpack": unpack}
+        names.update(self.constants)
+        for name, block in self.blocks.items():
+            # Plain functions are called directly, the rest through the block
+            if block.function is not None and not block.is_async:
+                names[name] = block.function
+            else:
+                names[name] = lambda _block=block, **params: _block.call(params)
+        return names
+
+
+def generate(
+        runsys: "RunSystem",
+        outputs: list[str | Output],
+        params: list[str | Output] = None,
+        name: str = "flow",
+    ) -> FlowSource:
+    """Writes the blocks leading to `outputs` as straight code, in plan order.
+    
+    Anchors become local variables, config values listed in `params` become
+    arguments and everything else read from outside is taken as a constant.
+    """
+    src = FlowSource(name)
+    src.outputs = list(outputs)
+    src.params = list(params or [])
+    
+    plan = runsys.get_plan()
+    keys = {block: key for key, block in runsys.blocks.items()}
+    collected = [runsys.anchor(key) for key in src.outputs]
+    needed = upstream([anchor.block for anchor in collected], set(plan))
+    
+    names: dict[Output, str] = {}
+    defined: set[str] = set()
+    forward: list[str] = []
+    present: set[str] = set() # Never SKIP, no need to check them
+    
+    for i, key in enumerate(src.params):
+        anchor = runsys.anchor(key)
+        if not isinstance(anchor, Output) or not isinstance(anchor.block, BlockConfig):
+            raise Exception(f"'{key}' is not a config value")
+        names[anchor] = f"p{i}"
+        defined.add(f"p{i}")
+        present.add(f"p{i}")
+        src.constants[f"d{i}"] = anchor.value
+    
+    def ref(output: Output) -> str:
+        if output not in names:
+            if output.block in needed and not isinstance(output.block, BlockConfig):
+                names[output] = f"v{len(names)}"
+            else:
+                names[output] = f"c{len(src.constants)}"
+                src.constants[names[output]] = output.value if output.status else SKIP
+                defined.add(names[output])
+                if output.status:
+                    present.add(names[output])
+        if names[output] not in defined and names[output] not in forward:
+            # Read before being produced, only happens on a cycle
+            forward.append(names[output])
+        return names[output]
+    
+    body: list[str] = []
+    for block in plan:
+        if block not in needed or isinstance(block, BlockConfig):
+            continue
+        if type(block).run is not Block.run:
+            raise Exception(f"Block '{keys[block]}' has its own run, it can't be compiled")
+        
+        produced = [names.setdefault(o, f"v{len(names)}") for o in block.outputs.values()]
+        produced.append(names.setdefault(block.runflag, f"v{len(names)}"))
+        body.append(f"    # {keys[block]} {block.name}")
+        
+        conds: list[str] = []
+        args: list[str] = []
+        runs = block.function is not None and (block.enabler.links or block.enabler.value)
+        for input in block.iter_inputs():
+            if input is block.enabler and not input.links:
+                continue
+            refs = [ref(link.backref) for link in input.links]
+            if not refs:
+                runs = False
+                break
+            conds.extend(f"{r} is not SKIP" for r in refs if r not in present)
+            expr = refs[0] if len(refs) == 1 else f"gather(({', '.join(refs)},), {input.vtype == 'flag'})"
+            if input is block.enabler:
+                conds.append(expr)
+            elif input.name.isidentifier():
+                args.append(f"{input.name}={expr}")
+            else:
+                args.append(f"**{{{input.name!r}: {expr}}}")
+        
+        if not runs:
+            body.append(f"    {' = '.join(produced)} = SKIP")
+            defined.update(produced)
+            continue
+        
+        func = f"f{len(src.blocks)}"
+        src.blocks[func] = block
+        body.append(f"    if {' and '.join(conds) or 'True'}:")
+        body.append(f"        r = {func}({', '.join(args)})")
+        body.extend(map_lines(block, produced[:-1]))
+        body.append(f"        {produced[-1]} = True")
+        body.append(f"    else:")
+        body.append(f"        {' = '.join(produced)} = SKIP")
+        defined.update(produced)
+    
+    results = []
+    for i, anchor in enumerate(collected):
+        var = ref(anchor)
+        src.constants[f"k{i}"] = src.outputs[i]
+        results.append(f"k{i}: None if {var} is SKIP else {var}")
+    
+    args = ', '.join(f"p{i}=d{i}" for i in range(len(src.params)))
+    src.lines.append(f"def {name}({args}):")
+    if forward:
+        src.lines.append(f"    {' = '.join(forward)} = SKIP")
+    src.lines.extend(body)
+    src.lines.append(f"    return {{{', '.join(results)}}}")
+    return src
+
+
+def map_lines(block: Block, produced: list[str]) -> list[str]:
+    """Inlines Block.map_result for the names of this block's outputs."""
+    outs = list(block.outputs.keys())
+    if not outs:
+        return []
+    
+    if len(outs) == 1:
+        return [
+            f"        if isinstance(r, dict):",
+            f"            {produced[0]} = r.get({outs[0]!r}, SKIP)",
+            f"        elif isinstance(r, tuple):",
+            f"            {produced[0]} = r[0] if r else SKIP",
+            f"        else:",
+            f"            {produced[0]} = r",
+        ]
+    
+    lines = [
+        f"        if isinstance(r, tuple) and len(r) == {len(outs)}:",
+        f"            {', '.join(produced)} = r",
+        f"        elif isinstance(r, dict):",
+    ]
+    lines.extend(f"            {var} = r.get({out!r}, SKIP)" for var, out in zip(produced, outs))
+    lines.append(f"        else:")
+    lines.append(f"            {', '.join(produced)} = unpack(r, {len(outs)})")
+    return lines
+
+
+def compile_flow(
+        runsys: "RunSystem",
+        outputs: list[str | Output],
+        params: list[str | Output] = None,
+    ) -> Callable[..., dict[str | Output, Any]]:
+    """Turns the flow into a single function, see generate."""
+    src = generate(runsys, outputs, params)
+    namespace = src.namespace()
+    exec(compile(src.code, f"<jabuti {src.name}>", "exec"), namespace)
+    
+    flow = namespace[src.name]
+    flow.source = src.code
+    flow.params = src.params
+    flow.outputs = src.outputs
+    return flow
+
+
+def function_source(func: Callable, name: str) -> tuple[list[str], set[str]]:
+    """Source defining `func` as `name` at module level, with the imports it needs."""
+    import re
+    import types
+    import inspect
+    import textwrap
+    
+    try:
+        lines = textwrap.dedent(inspect.getsource(func)).splitlines()
+    except (OSError, TypeError):
+        raise Exception(f"Source of '{func.__qualname__}' is not available")
+    
+    header = re.compile(r"^(async\s+)?def\s+\w+\s*\(")
+    if not lines or not header.match(lines[0]):
+        raise Exception(f"'{func.__qualname__}' must be a plain def to be exported")
+    
+    # Globals it reads, nested code objects included
+    imports: set[str] = set()
+    codes = [func.__code__]
+    while codes:
+        code = codes.pop()
+        codes.extend(c for c in code.co_consts if isinstance(c, types.CodeType))
+        for gname in code.co_names:
+            if gname not in func.__globals__:
+                continue
+            value = func.__globals__[gname]
+            if isinstance(value, types.ModuleType):
+                module = value.__name__
+                imports.add(f"import {module}" if module == gname else f"import {module} as {gname}")
+            elif getattr(value, "__module__", None) and getattr(value, "__qualname__", None) == gname:
+                imports.add(f"from {value.__module__} import {gname}")
+            else:
+                raise Exception(f"Global '{gname}' of '{func.__qualname__}' can't be exported")
+    
+    inner = f"_{name}" if inspect.iscoroutinefunction(func) else name
+    if not func.__code__.co_freevars:
+        lines[0] = header.sub(lambda m: f"{m.group(1) or ''}def {inner}(", lines[0], count=1)
+        source = lines
+    else:
+        # Captured values come back through a factory, keeping them private
+        cells = []
+        for var, cell in zip(func.__code__.co_freevars, func.__closure__):
+            value = cell.cell_contents
+            if not literal(value):
+                raise Exception(f"Captured '{var}' of '{func.__qualname__}' can't be exported")
+            cells.append(f"{var}={value!r}")
+        source = [f"def _make{inner}({', '.join(cells)}):"]
+        source.extend(f"    {line}" if line else line for line in lines)
+        source.append(f"    return {func.__name__}")
+        source.append(f"{inner} = _make{inner}()")
+    
+    if inner != name:
+        imports.add("import asyncio")
+        source.append(f"def {name}(**params):")
+        source.append(f"    return asyncio.run({inner}(**params))")
+    return source, imports
+
+
+def literal(value: Any) -> bool:
+    try:
+        return eval(repr(value), {}) == value
+    except Exception:
+        return False
+
+
+def export_module(
+        runsys: "RunSystem",
+        path: str,
+        outputs: list[str],
+        params: list[str] = None,
+    ) -> str:
+    """Writes the flow as a module that runs without jabuti, returns its source."""
+    import inspect
+    
+    if not all(isinstance(key, str) for key in [*outputs, *(params or [])]):
+        raise Exception(f"Only anchor keys like 'b1<x' can be exported")
+    
+    src = generate(runsys, outputs, params)
+    keys = {block: key for key, block in runsys.blocks.items()}
+    
+    imports: set[str] = set()
+    parts: list[list[str]] = []
+    for name, block in src.blocks.items():
+        lines, needs = function_source(block.function, name)
+        imports.update(needs)
+        parts.append([f"# {keys[block]}: {block.__module__}.{block.name}", *lines])
+    
+    consts = []
+    for name, value in src.constants.items():
+        if value is SKIP:
+            consts.append(f"{name} = SKIP")
+        elif literal(value):
+            consts.append(f"{name} = {value!r}")
+        else:
+            raise Exception(f"Value {value!r} can't be written as a literal")
+    
+    helpers = [inspect.getsource(gather).strip(), inspect.getsource(unpack).strip()]
+    text = [
+        f"# Generated by jabuti, export the flow again instead of editing this file",
+        f"from __future__ import annotations", # Annotations are never evaluated
+        *sorted(imports),
+        f"",
+        f"",
+        f"SKIP = object()",
+        f"PARAMS = {src.params!r}",
+        f"OUTPUTS = {src.outputs!r}",
+        f"",
+        f"",
+        '\n\n\n'.join(helpers),
+        f"",
+        f"",
+        '\n\n\n'.join('\n'.join(part) for part in parts),
+        f"",
+        f"",
+        *consts,
+        f"",
+        f"",
+        src.code,
+        f"",
+        f"if __name__ == \"__main__\":",
+        f"    print({src.name}())",
+        f"",
+    ]
+    code = '\n'.join(text)
+    with open(path, "w") as outpy:
+        outpy.write(code)
+    return code
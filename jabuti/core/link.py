@@ -1,8 +1,18 @@
+import typing
+import contextlib
+import contextvars
 from jabuti.core.anchor import Input, Output
 
 
 
+# Inputs told while propagation is deferred, None when it is done right away.
+# Kept per thread and per task, flows built or run elsewhere are left alone
+_deferred: contextvars.ContextVar[dict[Input, None] | None] = contextvars.ContextVar("deferred", default=None)
+
+
 class Link:
+    __slots__ = ("backref", "nextref", "healthy")
+    
     def __init__(self, output: Output, _input: Input) -> None:
         assert isinstance(output, Output)
         assert isinstance(_input, Input)
@@ -45,4 +55,45 @@ class Link:
         self.nextref.rmv_link(self)
     
     def propagate(self) -> None:
-        self.nextref.check()
+        pending = _deferred.get()
+        if pending is not None:
+            pending[self.nextref] = None
+            return
+        
+        self.nextref.check(self)
+        block = self.nextref.block
+        if block is not None and block.ready_queue is not None:
+            block.satisfy(self.nextref)
+
+
+@contextlib.contextmanager
+def deferred() -> typing.Iterator[None]:
+    """Sets only mark the linked inputs, each is checked once when leaving."""
+    if is_deferred(): # Nested, the outermost one resolves
+        yield
+        return
+    
+    token = _deferred.set({})
+    try:
+        yield
+        resolve()
+    finally:
+        _deferred.reset(token)
+
+
+def is_deferred() -> bool:
+    return _deferred.get() is not None
+
+
+def resolve() -> None:
+    """Checks the inputs marked so far, still deferring what comes next."""
+    pending = _deferred.get()
+    if not pending:
+        return
+    
+    _deferred.set({})
+    for input in pending:
+        input.check()
+        block = input.block
+        if block is not None and block.ready_queue is not None:
+            block.satisfy(input)
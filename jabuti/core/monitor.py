@@ -0,0 +1,232 @@
+import os
+import sys
+import time
+import pickle
+import typing
+import threading
+import collections
+if typing.TYPE_CHECKING:
+    from jabuti.core.block import Block
+
+
+
+def size_of(value: typing.Any) -> int:
+    """Bytes the value takes once pickled, a shallow size when it can't be."""
+    try:
+        return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class BlockRecord:
+    """Totals of every call made by a single block."""
+    def __init__(self, key: str, name: str) -> None:
+        self.key: str = key
+        self.name: str = name
+        self.calls: int = 0
+        self.wall: float = 0.0
+        self.cpu: float = 0.0
+        self.max_wall: float = 0.0
+        self.in_bytes: int = 0
+        self.out_bytes: int = 0
+    
+    def __repr__(self) -> str:
+        return f"(record) key:{self.key} name:{self.name} calls:{self.calls} wall:{self.wall:.6f}"
+    
+    def as_dict(self) -> dict[str, typing.Any]:
+        return {
+            "key": self.key,
+            "name": self.name,
+            "calls": self.calls,
+            "wall_ms": self.wall * 1000,
+            "cpu_ms": self.cpu * 1000,
+            "mean_ms": self.wall / self.calls * 1000 if self.calls else 0.0,
+            "max_ms": self.max_wall * 1000,
+            "in_bytes": self.in_bytes,
+            "out_bytes": self.out_bytes,
+        }
+
+
+class ReadyQueue(collections.deque):
+    """Queue of ready blocks that notes when each monitored block got in."""
+    def __init__(self, monitor: "Monitor") -> None:
+        super().__init__()
+        self.monitor: Monitor = monitor
+    
+    def append(self, block: "Block") -> None:
+        if block.monitor is not None:
+            self.monitor.ready[block] = time.perf_counter()
+        super().append(block)
+
+
+class Monitor:
+    """Times the blocks it is attached to, see RunSystem.set_monitor.
+    
+    Blocks without a monitor only pay for checking that they have none. With
+    `sizes` the inputs and results are pickled to count their bytes, which can
+    cost more than the blocks themselves. With `trace` every call is also kept
+    as a span, see write_trace.
+    """
+    def __init__(self, sizes: bool = False, trace: bool = False) -> None:
+        self.sizes: bool = sizes
+        self.trace: bool = trace
+        self.keys: dict["Block", str] = {}
+        self.records: dict["Block", BlockRecord] = {}
+        self.loops: int = 0
+        self.loop_wall: float = 0.0
+        self.lock: threading.Lock = threading.Lock()
+        
+        # Spans as (key, name, ready, start, end, pid, tid), perf_counter seconds
+        self.pid: int = os.getpid()
+        self.origin: float = time.perf_counter()
+        self.ready: dict["Block", float] = {}
+        self.spans: list[tuple] = []
+        self.loop_spans: list[tuple[float, float, int]] = []
+    
+    def __repr__(self) -> str:
+        return f"(monitor) blocks:{len(self.records)} loops:{self.loops}"
+    
+    def start(self) -> tuple[float, float]:
+        return time.perf_counter(), time.thread_time()
+    
+    def ready_queue(self) -> collections.deque["Block"]:
+        return ReadyQueue(self) if self.trace else collections.deque()
+    
+    def stop(self, block: "Block", start: tuple[float, float], params: typing.Any, result: typing.Any) -> None:
+        wall, cpu = start
+        self.add(block, time.perf_counter() - wall, time.thread_time() - cpu, params, result, wall)
+    
+    def add(self,
+            block: "Block",
+            wall: float,
+            cpu: float,
+            params: typing.Any,
+            result: typing.Any,
+            started: float = None,
+            pid: int = None,
+            tid: int = None,
+        ) -> None:
+        """Counts one call, `started` and where it ran are only used by traces."""
+        in_bytes = size_of(params) if self.sizes and params is not None else 0
+        out_bytes = size_of(result) if self.sizes and result is not None else 0
+        
+        with self.lock:
+            if self.trace and started is not None:
+                self.spans.append((
+                    self.keys.get(block, block.idf), block.name, self.ready.pop(block, None),
+                    started, started + wall, pid or os.getpid(), tid or threading.get_native_id(),
+                ))
+            record = self.records.get(block)
+            if record is None:
+                record = BlockRecord(self.keys.get(block, block.idf), block.name)
+                self.records[block] = record
+            record.calls += 1
+            record.wall += wall
+            record.cpu += cpu
+            record.max_wall = max(record.max_wall, wall)
+            record.in_bytes += in_bytes
+            record.out_bytes += out_bytes
+    
+    def add_loop(self, wall: float, started: float = None) -> None:
+        with self.lock:
+            self.loops += 1
+            self.loop_wall += wall
+            if self.trace and started is not None:
+                self.loop_spans.append((started, started + wall, threading.get_native_id()))
+    
+    def clear(self) -> None:
+        with self.lock:
+            self.records.clear()
+            self.loops = 0
+            self.loop_wall = 0.0
+            self.origin = time.perf_counter()
+            self.ready.clear()
+            self.spans.clear()
+            self.loop_spans.clear()
+    
+    def report(self) -> dict[str, typing.Any]:
+        """Totals of the loops and of each block, the slowest blocks first."""
+        records = sorted(self.records.values(), key=lambda r: r.wall, reverse=True)
+        blocks = [record.as_dict() for record in records]
+        for block in blocks:
+            block["share"] = block["wall_ms"] / (self.loop_wall * 1000) if self.loop_wall else 0.0
+        return {
+            "loops": self.loops,
+            "loop_ms": self.loop_wall * 1000,
+            "blocks_ms": sum(record.wall for record in records) * 1000,
+            "blocks": blocks,
+        }
+    
+    def format(self) -> str:
+        report = self.report()
+        lines = [
+            f"loops: {report['loops']}  loop: {report['loop_ms']:.3f} ms  blocks: {report['blocks_ms']:.3f} ms",
+            f"{'key': <8} {'name': <16} {'calls': >7} {'wall ms': >10} {'cpu ms': >10} {'mean ms': >9} {'max ms': >9} {'in B': >9} {'out B': >9} {'share': >6}",
+        ]
+        for b in report["blocks"]:
+            lines.append(
+                f"{str(b['key']): <8} {b['name']: <16} {b['calls']: >7} {b['wall_ms']: >10.3f} {b['cpu_ms']: >10.3f}"
+                f" {b['mean_ms']: >9.4f} {b['max_ms']: >9.4f} {b['in_bytes']: >9} {b['out_bytes']: >9} {b['share']: >6.1%}"
+            )
+        return '\n'.join(lines)
+    
+    def trace_events(self) -> list[dict[str, typing.Any]]:
+        """The spans as trace events, in microseconds since the monitor started.
+        
+        Each process and thread gets a track, spans overlapping on the same
+        thread (awaited tasks) are spread over extra lanes. The time a block
+        spent ready but not started is an async span in the "wait" category.
+        """
+        def us(seconds: float) -> float:
+            return round((seconds - self.origin) * 1e6, 3)
+        
+        with self.lock:
+            spans = sorted(self.spans, key=lambda s: s[3])
+            loop_spans = list(self.loop_spans)
+        
+        events: list[dict[str, typing.Any]] = []
+        tracks: dict[tuple[int, int, int], int] = {}
+        lanes: dict[tuple[int, int], list[float]] = {}
+        
+        def track(pid: int, tid: int, lane: int) -> int:
+            if (pid, tid, lane) not in tracks:
+                tracks[(pid, tid, lane)] = len(tracks) + 1
+                name = f"thread {tid}" + (f" lane {lane}" if lane else "")
+                events.append({"name": "thread_name", "ph": "M", "pid": pid,
+                    "tid": tracks[(pid, tid, lane)], "args": {"name": name}})
+            return tracks[(pid, tid, lane)]
+        
+        pids = {self.pid} | {span[5] for span in spans}
+        for pid in sorted(pids):
+            name = "main" if pid == self.pid else f"worker {pid}"
+            events.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": name}})
+        
+        if loop_spans:
+            events.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": "loops"}})
+        for start, end, _ in loop_spans:
+            events.append({"name": "loop", "cat": "loop", "ph": "X", "pid": self.pid, "tid": 0,
+                "ts": us(start), "dur": round((end - start) * 1e6, 3)})
+        
+        for i, (key, name, ready, start, end, pid, tid) in enumerate(spans):
+            ends = lanes.setdefault((pid, tid), [])
+            lane = next((n for n, last in enumerate(ends) if last <= start), len(ends))
+            if lane == len(ends):
+                ends.append(end)
+            else:
+                ends[lane] = end
+            
+            args = {"key": key}
+            if ready is not None and ready < start:
+                args["wait_ms"] = (start - ready) * 1000
+                wait = {"name": f"{key} wait", "cat": "wait", "id": i, "pid": self.pid, "tid": 0}
+                events.append({**wait, "ph": "b", "ts": us(ready)})
+                events.append({**wait, "ph": "e", "ts": us(start)})
+            events.append({"name": f"{key} {name}", "cat": "block", "ph": "X", "pid": pid,
+                "tid": track(pid, tid, lane), "ts": us(start), "dur": round((end - start) * 1e6, 3), "args": args})
+        return events
+    
+    def write_trace(self, path: str) -> None:
+        """Writes the spans as a trace file, opened by Perfetto or chrome://tracing."""
+        import json
+        with open(path, "w") as outjson:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, outjson)
@@ -1,12 +1,62 @@
+import os
+import time
 import typing
-from jabuti.core.link import Link
-from jabuti.core.block import Block
-from jabuti.core.anchor import Anchor
+import contextlib
+import collections
+from jabuti.core.link import Link, deferred, resolve
+from jabuti.core.block import Block, BlockConfig
+from jabuti.core.anchor import Anchor, Output
+if typing.TYPE_CHECKING:
+    import asyncio
+    import concurrent.futures as cf
+    from jabuti.core.cache import ResultCache, DiskCache
+    from jabuti.core.monitor import Monitor
 
 
 
+# Blocks of the systems running on processes, forked workers inherit them
+# so only the keys and the parameters need to be pickled
+_forked_blocks: dict[int, dict[str, Block]] = {}
+
+
+def _execute_forked(system_id: int, block_key: str, params: dict[str, any], timed: bool = False) -> any:
+    # The cache lives on the parent, a forked copy would just be thrown away
+    if not timed:
+        return _forked_blocks[system_id][block_key].call(params)
+    
+    # perf_counter is the same clock on every process, the spans line up
+    wall, cpu = time.perf_counter(), time.process_time()
+    result = _forked_blocks[system_id][block_key].call(params)
+    return result, wall, time.perf_counter() - wall, time.process_time() - cpu, os.getpid()
+
+
+@contextlib.contextmanager
+def _paused_gc() -> typing.Iterator[None]:
+    """No cyclic collections while making many objects that all stay alive."""
+    import gc
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _changed(old: any, new: any) -> bool:
+    if old is new:
+        return False
+    try:
+        return bool(old != new)
+    except Exception: # Values without a plain truth, like arrays
+        return True
+
+
 class RunSystem:
-    def __init__(self) -> None:
+    def __init__(self,
+            scheduler: typing.Literal["plan", "queue"] = "plan",
+            propagation: typing.Literal["eager", "deferred"] = "eager",
+        ) -> None:
         self.links: dict[str, Link] = {}
         self.blocks: dict[str, Block] = {}
         self.counts: dict[str, int] = {"block": 0, "link": 0}
@@ -14,14 +64,50 @@ class RunSystem:
         self.block_maps: dict[str, dict[str, str | typing.Type]] = {}
         self._load_blocks()
         
+        self.scheduler: str = scheduler
+        self.propagation: str = propagation
         self.finished: bool = False
-        self.awaiting: dict[int, Block] = {}
+        self.awaiting: collections.deque[Block] = collections.deque()
+        
+        # Topological execution plan, compiled on demand and reused across runs
+        self.plan: list[Block] = None
+        self.plan_revision: int = -1
+        
+        # Blocks feeding and fed by each block, with the number of links between
+        # them, kept up to date by the edits made through the system
+        self.successors: dict[Block, dict[Block, int]] = {}
+        self.predecessors: dict[Block, dict[Block, int]] = {}
+        self.index_revision: int = 0
+        
+        # Counted by the blocks as their links change, see Block.edited
+        self.edits: int = 0
+        
+        # Incremental runs: blocks to run now, and what changed since the last run
+        self.targets: list[Block] = []
+        self.dirty: set[Block] = set()
+        self.run_revision: int = -1
+        self.config_values: dict[Block, dict[str, any]] = None
+        self.enabler_values: dict[Block, bool] = None
+        
+        # Opt-in memoization of the block results, see set_cache
+        self.cache: "ResultCache | DiskCache" = None
+        self.cached: set[str] = None
+        
+        # Opt-in timing of the blocks and of the loops, see set_monitor
+        self.monitor: "Monitor" = None
+        self.monitored: set[str] = None
     
     def setup(self,
             blocks: dict[str, dict[str, str]] = None,
-            links: dict[str, dict[str, str]] = None,
+            links: dict[str, str | tuple[str, str, str, str]] = None,
+        ) -> None:
+        with _paused_gc():
+            self.__setup(blocks, links)
+    
+    def __setup(self,
+            blocks: dict[str, dict[str, str]] = None,
+            links: dict[str, str | tuple[str, str, str, str]] = None,
         ) -> None:
-        
         if blocks is not None:
             maxb = 0
             for block_key, block_data in blocks.items():
@@ -34,15 +120,20 @@ class RunSystem:
         
         if links is not None:
             maxl = 0
-            for link_key, link_data in links.items():
-                maxl = max(maxl, int(link_key.removeprefix('l')))
-                self._build_link(link_data, link_key)
+            # Every input is checked once at the end, not once per new link
+            with deferred():
+                for link_key, link_data in links.items():
+                    maxl = max(maxl, int(link_key.removeprefix('l')))
+                    self._build_link(link_data, link_key)
             self.counts["link"] = maxl
     
     @staticmethod
     def from_file(config_path: str) -> "RunSystem":
-        import json
-        
+        with _paused_gc():
+            return RunSystem.__from_file(config_path)
+    
+    @staticmethod
+    def __from_file(config_path: str) -> "RunSystem":
         conf: dict[str, dict[str, dict]]
         
         ext = config_path.split('.')[-1].lower()
@@ -54,13 +145,16 @@ class RunSystem:
             
             case 'toml':
                 import tomllib
-                with open("./tests/runsys/rs1.toml", 'rb') as intoml:
+                with open(config_path, 'rb') as intoml:
                     conf = tomllib.load(intoml)
             
             case _:
-                print(f"Unsuported extension: '{ext}'")
-                return None
-        print(f"conf {ext}     = {conf}")
+                from jabuti.utils import binflow
+                # Binary flows are also known by their first bytes
+                if ext != binflow.EXTENSION and not binflow.is_binflow(config_path):
+                    print(f"Unsuported extension: '{ext}'")
+                    return None
+                conf = binflow.load(config_path)
         
         rs = RunSystem()
         rs.setup(
@@ -70,6 +164,26 @@ class RunSystem:
         
         return rs
     
+    def to_file(self, config_path: str) -> None:
+        """Saves the flow as json, toml or a binary flow, by the extension."""
+        ext = config_path.split('.')[-1].lower()
+        match ext:
+            case 'json':
+                import json
+                with open(config_path, "w") as outjson:
+                    json.dump(self._export(), outjson)
+            
+            case 'toml':
+                from jabuti.utils.toml import obj_to_toml
+                with open(config_path, "w") as outtoml:
+                    outtoml.write(obj_to_toml(self._export()))
+            
+            case _:
+                from jabuti.utils import binflow
+                if ext != binflow.EXTENSION:
+                    raise Exception(f"Unsuported extension: '{ext}'")
+                binflow.dump(self._export(), config_path)
+    
     def __getitem__(self, item: str) -> Link | Block | Anchor:
         if len(item) < 2:
             return
@@ -94,6 +208,12 @@ class RunSystem:
             anchor = block[ak]
             return anchor                                      # ANCHOR
     
+    def anchor(self, key: str | Anchor) -> Anchor:
+        anchor = key if isinstance(key, Anchor) else self[key]
+        if not isinstance(anchor, Anchor):
+            raise Exception(f"Anchor '{key}' not found")
+        return anchor
+    
     def _build_block(self,
             block_class: str,
             block_key: str = None,
@@ -106,18 +226,34 @@ class RunSystem:
         if block_key is None:
             block_key = f"b{self.__get_count('block', True)}"
         
-        const = self.block_maps.get(block_class)["class"]
+        from jabuti.utils import finder
+        
+        const = finder.load_class(self.block_maps[block_class])
         block: Block = const(*args, **params)
         block.idf = block_key
+        block.init_args = (args, params)
         self.blocks[block_key] = block
+        self.__attach(block_key, block)
+        self.__index_block(block)
+        block.systems[self] = None
+        self.dirty.add(block)
+        self.plan = None
     
-    def _build_link(self, link_data: str, link_key: str = None) -> None:
+    def _build_link(self, link_data: str | tuple[str, str, str, str], link_key: str = None) -> None:
         if link_key is None:
             link_key = f"l{self.__get_count('link', True)}"
         
-        ak0, ak1 = link_data.split('-')
-        a0: Anchor = self[ak0]
-        a1: Anchor = self[ak1]
+        if isinstance(link_data, str):
+            ak0, ak1 = link_data.split('-')
+            a0: Anchor = self[ak0]
+            a1: Anchor = self[ak1]
+        else:
+            # Already split as (block, output, block, input), like binary flows are
+            bk0, an0, bk1, an1 = link_data
+            ak0, ak1 = link_data[:2], link_data[2:]
+            b0, b1 = self.blocks.get(bk0), self.blocks.get(bk1)
+            a0 = None if b0 is None else b0.outputs.get(an0) or b0[f"<{an0}"]
+            a1 = None if b1 is None else b1.inputs.get(an1) or b1[f">{an1}"]
         
         if a0 is None or a1 is None:
             print(f"{ak0=} or {ak1=} does not exist")
@@ -125,6 +261,7 @@ class RunSystem:
         
         link = Link(a0, a1)
         self.links[link_key] = link
+        self.__link_edited(link)
     
     def _export(self) -> dict[str]:
         data = {
@@ -161,28 +298,45 @@ class RunSystem:
         }
     
     def _load_blocks(self, clear: bool = False) -> None:
-        import jabuti as jb
-        import jabuti.utils.finder as finder
+        import jabuti.builtin as builtin
+        from jabuti.utils import finder
         
-        clsdesc = finder.find_full_classes([jb.builtin, "./custom/"])
+        clsdesc = finder.find_full_classes([builtin, "./custom/"])
         if clear:
             self.block_maps = {}
         self.block_maps.update(clsdesc)
     
     def add_block(self, block: Block) -> int:
-        if block in self.blocks.values():
+        # The index holds every block, no need to look through the values
+        if len(self.successors) != len(self.blocks):
+            self.index_blocks()
+        if block in self.successors:
             return 0
         block_id = self.__get_count("block", True)
         self.blocks[block_id] = block
+        self.__attach(block_id, block)
+        self.__index_block(block)
+        block.systems[self] = None
+        self.dirty.add(block)
+        self.plan = None
         return block_id
     
     def rmv_block(self, block_id: int) -> Block:
-        return self.blocks.pop(block_id, None)
+        block = self.blocks.pop(block_id, None)
+        if block is not None:
+            for link in block.links:
+                self.dirty.add(link.nextref.block)
+            self.dirty.discard(block)
+            block.systems.pop(self, None)
+            self.__unindex_block(block)
+        self.plan = None
+        return block
     
     def add_link(self, ba0: tuple[int, str], ba1: tuple[int, str]) -> Link:
         b0: Block = self.blocks.get(ba0[0])
         b1: Block = self.blocks.get(ba1[0])
         link = b0[f"<{ba0[1]}"].link_with(b1[f">{ba1[1]}"])
+        self.__link_edited(link)
         lid = self.__get_count("link", True)
         self.links[lid] = link
         return lid
@@ -193,28 +347,586 @@ class RunSystem:
         
         link = self.links.pop(link_id)
         link.unlink()
+        self.__link_edited(link)
     
-    def reset_blocks(self) -> None:
-        self.finished = False
+    def __link_edited(self, link: Link) -> None:
+        # Edits made through the system are known, they don't force a full run.
+        # The revisions only match again if nothing else was edited meanwhile
+        ends = (link.backref.block in self.successors) + (link.nextref.block in self.successors)
+        self.run_revision += ends
+        self.index_revision += ends
+        self.__index_link(link, 1 if link in link.nextref.links else -1)
+        self.dirty.add(link.nextref.block)
+    
+    def revision(self) -> int:
+        """Moves whenever a link is made or dropped at one of the blocks."""
+        return self.edits
+    
+    def __index_block(self, block: Block) -> None:
+        if block in self.successors:
+            return
+        self.successors[block] = {}
+        self.predecessors[block] = {}
+        for link in block.links:
+            self.__index_link(link, 1)
+    
+    def __unindex_block(self, block: Block) -> None:
+        if block not in self.successors:
+            return
+        for link in block.links:
+            self.__index_link(link, -1)
+        del self.successors[block]
+        del self.predecessors[block]
+    
+    def __index_link(self, link: Link, step: int) -> None:
+        source, target = link.backref.block, link.nextref.block
+        # Blocks outside the system only provide values, never order
+        if source is target or source not in self.successors or target not in self.predecessors:
+            return
+        count = self.successors[source].get(target, 0) + step
+        if count > 0:
+            self.successors[source][target] = count
+            self.predecessors[target][source] = count
+        else:
+            self.successors[source].pop(target, None)
+            self.predecessors[target].pop(source, None)
+    
+    def index_blocks(self) -> None:
+        """Rebuilds the successors and predecessors from the links."""
+        self.successors = {block: {} for block in self.blocks.values()}
+        self.predecessors = {block: {} for block in self.blocks.values()}
         for block in self.blocks.values():
+            block.systems[self] = None # Also those put in blocks by hand
+            for input in block.iter_inputs():
+                for link in input.links:
+                    self.__index_link(link, 1)
+        self.index_revision = self.revision()
+    
+    def get_index(self) -> tuple[dict[Block, dict[Block, int]], dict[Block, dict[Block, int]]]:
+        # Links edited or blocks added behind the system's back
+        if self.index_revision != self.revision() or len(self.successors) != len(self.blocks):
+            self.index_blocks()
+        return self.successors, self.predecessors
+    
+    def get_successors(self, block: Block) -> typing.KeysView[Block]:
+        return self.get_index()[0][block].keys()
+    
+    def get_predecessors(self, block: Block) -> typing.KeysView[Block]:
+        return self.get_index()[1][block].keys()
+    
+    def set_cache(self, cache: "ResultCache | DiskCache | None", blocks: list[str] = None) -> None:
+        """Lets the given blocks (all by default) reuse their results from `cache`."""
+        self.cache = cache
+        self.cached = set(blocks) if blocks is not None else None
+        for block_key, block in self.blocks.items():
+            block.cache = None
+            self.__attach(block_key, block)
+    
+    def __attach(self, block_key: str, block: Block) -> None:
+        if self.cached is None or block_key in self.cached:
+            block.cache = self.cache
+        if self.monitor is not None and (self.monitored is None or block_key in self.monitored):
+            block.monitor = self.monitor
+            self.monitor.keys[block] = block_key
+    
+    def set_monitor(self, monitor: "Monitor | None", blocks: list[str] = None) -> None:
+        """Times the given blocks (all by default) and the loops into `monitor`."""
+        self.monitor = monitor
+        self.monitored = set(blocks) if blocks is not None else None
+        for block_key, block in self.blocks.items():
+            block.monitor = None
+            self.__attach(block_key, block)
+    
+    def export_trace(self, path: str) -> None:
+        """Writes the spans of the tracing monitor, see Monitor.write_trace."""
+        if self.monitor is None or not self.monitor.trace:
+            raise Exception(f"No tracing monitor is set, use set_monitor(Monitor(trace=True))")
+        self.monitor.write_trace(path)
+    
+    def mark_dirty(self, block: Block) -> None:
+        self.dirty.add(block)
+    
+    def compile_plan(self) -> list[Block]:
+        """Orders the blocks so that every block comes after the ones feeding it."""
+        successors, predecessors = self.get_index()
+        blocks = list(self.blocks.values())
+        indegree: dict[Block, int] = {block: len(predecessors[block]) for block in blocks}
+        
+        # Kahn's algorithm, seeded in registration order to stay deterministic
+        queue = collections.deque(b for b in blocks if not indegree[b])
+        plan: list[Block] = []
+        while queue:
+            block = queue.popleft()
+            plan.append(block)
+            for succ in successors[block]:
+                indegree[succ] -= 1
+                if not indegree[succ]:
+                    queue.append(succ)
+        
+        # Blocks in a cycle never become ready, they are only kept for completeness
+        if len(plan) < len(blocks):
+            plan.extend(b for b in blocks if indegree[b])
+        
+        self.plan = plan
+        self.plan_revision = self.revision()
+        return plan
+    
+    def get_plan(self) -> list[Block]:
+        if self.plan is None or self.plan_revision != self.revision():
+            self.compile_plan()
+        return self.plan
+    
+    def downstream(self, blocks: typing.Iterable[Block]) -> set[Block]:
+        edges = self.get_index()[0]
+        found = set(b for b in blocks if b in edges)
+        stack = list(found)
+        while stack:
+            for succ in edges[stack.pop()]:
+                if succ not in found:
+                    found.add(succ)
+                    stack.append(succ)
+        return found
+    
+    def reset_blocks(self, blocks: list[Block] = None) -> None:
+        self.finished = False
+        if blocks is None:
+            blocks = self.get_plan()
+        self.targets = blocks
+        for block in blocks:
             block.reset()
-        self.awaiting = self.blocks.copy()
+        self.awaiting.clear()
+        if self.scheduler == "plan":
+            self.awaiting.extend(blocks)
+    
+    def reset_changed(self) -> None:
+        """Only resets the blocks downstream of what changed since the last run."""
+        plan = self.get_plan()
+        
+        # Never ran or links were edited behind the system's back
+        if self.config_values is None or self.revision() != self.run_revision:
+            self.reset_blocks()
+            return
+        
+        # Only what reads a changed value is affected, not the whole config
+        for block, values in self.config_values.items():
+            for name, output in block.outputs.items():
+                if name not in values or _changed(values[name], output.value):
+                    self.dirty.update(link.nextref.block for link in output.links)
+        
+        # Enablers without links are set by hand, like Group.update does
+        for block, value in self.enabler_values.items():
+            if block.enabler is not None and _changed(value, block.enabler.value):
+                self.dirty.add(block)
+        
+        changed = self.downstream(self.dirty)
+        self.reset_blocks([block for block in plan if block in changed])
+    
+    def __snapshot(self) -> None:
+        self.dirty.clear()
+        self.run_revision = self.revision()
+        self.config_values = {
+            block: {name: output.value for name, output in block.outputs.items()}
+            for block in self.blocks.values()
+            if isinstance(block, BlockConfig)
+        }
+        self.enabler_values = {
+            block: block.enabler.value
+            for block in self.blocks.values()
+            if block.enabler is not None and not block.enabler.links
+        }
     
     def run_next(self) -> None:
-        if not self.awaiting or self.finished:
+        if self.finished:
             # print(f"Nothing to run")
             return
         
-        for block in self.awaiting.values():
+        # Following the plan, a block that is not ready when its turn comes
+        # will never be, since everything upstream of it was already handled
+        while self.awaiting:
+            block = self.awaiting.popleft()
             if block.is_ready() and not block.status:
                 # print(f"Running block {block}")
-                block.run()
+                self.run_block(block)
                 return
         
         self.finished = True
         # print(f"No blocks left to run")
     
-    def run_loop(self) -> None:
-        self.reset_blocks()
-        while not self.finished:
-            self.run_next()
+    def arm_blocks(self) -> collections.deque[Block]:
+        ready: collections.deque[Block] = collections.deque()
+        if self.monitor is not None:
+            ready = self.monitor.ready_queue()
+        for block in self.targets:
+            block.arm(ready)
+        return ready
+    
+    def disarm_blocks(self) -> None:
+        for block in self.targets:
+            block.disarm()
+    
+    def run_block(self, block: Block) -> None:
+        # Blocks with their own run are timed whole, the others by execute
+        if block.monitor is not None and type(block).run is not Block.run:
+            start = block.monitor.start()
+            block.run()
+            block.monitor.stop(block, start, None, block.result)
+            return
+        block.run()
+    
+    def run_queue(self) -> None:
+        """Runs the blocks as the propagated outputs make them ready."""
+        ready = self.arm_blocks()
+        try:
+            while ready:
+                block = ready.popleft()
+                if not block.status and block.is_ready():
+                    self.run_block(block)
+                    resolve()
+        finally:
+            self.disarm_blocks()
+        
+        self.awaiting.clear()
+        self.finished = True
+    
+    def run_pool(self, submit: typing.Callable[[Block, dict], "cf.Future"]) -> None:
+        """Hands every ready block to `submit` at once, finishing them as they end."""
+        import concurrent.futures as cf
+        
+        ready = self.arm_blocks()
+        running: dict[cf.Future, Block] = {}
+        try:
+            while ready or running:
+                while ready:
+                    block = ready.popleft()
+                    if block.status or not block.is_ready():
+                        continue
+                    
+                    # Blocks with their own run can't be split, they stay here
+                    if type(block).run is not Block.run:
+                        self.run_block(block)
+                        resolve()
+                        continue
+                    
+                    params = block.prepare()
+                    if params is not None:
+                        running[submit(block, params)] = block
+                
+                if not running:
+                    break
+                
+                # Outputs are only ever set from this thread
+                done, _ = cf.wait(running, return_when=cf.FIRST_COMPLETED)
+                for future in done:
+                    block = running.pop(future)
+                    block.finish(future.result())
+                resolve()
+        finally:
+            for future in running:
+                future.cancel()
+            self.disarm_blocks()
+        
+        self.awaiting.clear()
+        self.finished = True
+    
+    def run_threads(self, workers: int = None) -> None:
+        import concurrent.futures as cf
+        
+        with cf.ThreadPoolExecutor(max_workers=workers) as pool:
+            self.run_pool(lambda block, params: pool.submit(block.execute, params))
+    
+    def run_processes(self, workers: int = None) -> None:
+        import multiprocessing as mp
+        import concurrent.futures as cf
+        
+        if "fork" not in mp.get_all_start_methods():
+            print(f"Fork is not available, running on threads instead")
+            self.run_threads(workers)
+            return
+        
+        system_id = id(self)
+        keys = {block: key for key, block in self.blocks.items()}
+        _forked_blocks[system_id] = self.blocks
+        
+        def submit(block: Block, params: dict[str, any]) -> cf.Future:
+            monitor = block.monitor
+            if block.cache is None and monitor is None:
+                return pool.submit(_execute_forked, system_id, keys[block], params)
+            
+            if block.cache is not None:
+                start = monitor.start() if monitor is not None else None
+                key = block.cache.key(block, params)
+                hit, result = block.cache.get(key)
+                if hit:
+                    if monitor is not None:
+                        monitor.stop(block, start, params, result)
+                    future = cf.Future()
+                    future.set_result(result)
+                    return future
+            
+            # Timed by the child, stored and reported here once it is done
+            done = cf.Future()
+            def finish(future: cf.Future) -> None:
+                if done.done():
+                    return
+                if future.exception() is not None:
+                    done.set_exception(future.exception())
+                    return
+                result = future.result()
+                if monitor is not None:
+                    result, started, wall, cpu, pid = result
+                    monitor.add(block, wall, cpu, params, result, started, pid, pid)
+                if block.cache is not None:
+                    block.cache.put(key, result)
+                done.set_result(result)
+            
+            future = pool.submit(_execute_forked, system_id, keys[block], params, monitor is not None)
+            future.add_done_callback(finish)
+            return done
+        
+        try:
+            context = mp.get_context("fork")
+            with cf.ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                self.run_pool(submit)
+        finally:
+            _forked_blocks.pop(system_id, None)
+    
+    async def run_async(self) -> None:
+        """Awaits every ready block concurrently on the running loop."""
+        import asyncio
+        
+        ready = self.arm_blocks()
+        running: dict[asyncio.Task, Block] = {}
+        try:
+            while ready or running:
+                while ready:
+                    block = ready.popleft()
+                    if block.status or not block.is_ready():
+                        continue
+                    
+                    # Blocks with their own run can't be split, they stay here.
+                    # Plain functions go in tasks too, they may return a coroutine
+                    if type(block).run is not Block.run:
+                        self.run_block(block)
+                        resolve()
+                        continue
+                    
+                    params = block.prepare()
+                    if params is not None:
+                        running[asyncio.ensure_future(block.execute_async(params))] = block
+                
+                if not running:
+                    break
+                
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    block = running.pop(task)
+                    block.finish(task.result())
+                resolve()
+        finally:
+            for task in running:
+                task.cancel()
+            self.disarm_blocks()
+        
+        self.awaiting.clear()
+        self.finished = True
+    
+    async def run_loop_async(self, incremental: bool = False) -> None:
+        start = time.perf_counter()
+        if incremental:
+            self.reset_changed()
+        else:
+            self.reset_blocks()
+        with self.propagating():
+            await self.run_async()
+        self.__snapshot()
+        if self.monitor is not None:
+            self.monitor.add_loop(time.perf_counter() - start, start)
+    
+    def run_loop(self,
+            executor: typing.Literal["serial", "threads", "processes", "async"] = "serial",
+            workers: int = None,
+            incremental: bool = False,
+        ) -> None:
+        start = time.perf_counter()
+        if incremental:
+            self.reset_changed()
+        else:
+            self.reset_blocks()
+        self.run_targets(executor, workers)
+        self.__snapshot()
+        if self.monitor is not None:
+            self.monitor.add_loop(time.perf_counter() - start, start)
+    
+    def propagating(self) -> typing.ContextManager:
+        """Batches the checks of the inputs while running, if so configured."""
+        if self.propagation == "deferred":
+            return deferred()
+        return contextlib.nullcontext()
+    
+    def run_targets(self,
+            executor: typing.Literal["serial", "threads", "processes", "async"] = "serial",
+            workers: int = None,
+        ) -> None:
+        """Runs the blocks picked by the last reset."""
+        with self.propagating():
+            # The plan never learns when a block got ready, so traces have no
+            # waits unless the serial run goes through the ready queue
+            tracing = self.monitor is not None and self.monitor.trace
+            match executor:
+                case "serial" if self.scheduler == "queue" or tracing:
+                    self.run_queue()
+                
+                case "serial":
+                    while not self.finished:
+                        self.run_next()
+                
+                case "threads":
+                    self.run_threads(workers)
+                
+                case "processes":
+                    self.run_processes(workers)
+                
+                case "async":
+                    import asyncio
+                    asyncio.run(self.run_async())
+                
+                case _:
+                    raise Exception(f"Executor '{executor}' not found")
+    
+    def sweep(self,
+            table: dict[str | Output, typing.Sequence] | list[dict[str | Output, any]],
+            outputs: list[str | Output],
+            vectorize: bool = True,
+        ) -> dict[str | Output, list]:
+        """Runs the flow once per row of config values, collecting the outputs.
+        
+        Columns and outputs are anchors or their keys, like 'b1<x'. When every
+        block reading the swept values is vectorized and numpy is available
+        the whole batch goes through the flow in a single run instead.
+        """
+        if isinstance(table, list):
+            columns = {key: [row[key] for row in table] for key in (table[0] if table else {})}
+        else:
+            columns = dict(table)
+        
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise Exception(f"Columns of different lengths: {sorted(lengths)}")
+        rows = lengths.pop() if lengths else 0
+        
+        swept: dict[str | Output, Output] = {}
+        for key in columns:
+            anchor = self.anchor(key)
+            if not isinstance(anchor, Output) or not isinstance(anchor.block, BlockConfig):
+                raise Exception(f"'{key}' is not a config value")
+            swept[key] = anchor
+        collected = {key: self.anchor(key) for key in outputs}
+        
+        originals = {anchor.block: {} for anchor in swept.values()}
+        for anchor in swept.values():
+            originals[anchor.block][anchor.name] = anchor.value
+        
+        try:
+            results = None
+            if vectorize and rows:
+                results = self.__sweep_vectorized(columns, swept, collected, rows)
+            if results is None:
+                results = {key: [] for key in collected}
+                for row in range(rows):
+                    for key, anchor in swept.items():
+                        anchor.set(columns[key][row])
+                    self.run_loop(incremental=True)
+                    for key, anchor in collected.items():
+                        results[key].append(anchor.value if anchor.status else None)
+        finally:
+            # Back to how it was, the next incremental run catches up
+            for block, values in originals.items():
+                block.update(values)
+        
+        return results
+    
+    def __sweep_vectorized(self,
+            columns: dict[str | Output, typing.Sequence],
+            swept: dict[str | Output, Output],
+            collected: dict[str | Output, Output],
+            rows: int,
+        ) -> dict[str | Output, list] | None:
+        try:
+            import numpy as np
+        except ImportError:
+            return None
+        
+        self.get_plan()
+        readers = [link.nextref.block for anchor in swept.values() for link in anchor.links]
+        if not all(block.vectorized for block in self.downstream(readers)):
+            return None
+        
+        try:
+            for key, anchor in swept.items():
+                # Arrays of the python values themselves, the operators are the
+                # same as row by row: no int64 overflow, nan or inf instead of
+                # complex results and errors
+                column = columns[key]
+                array = np.empty(rows, dtype=object)
+                array[:] = column.tolist() if isinstance(column, np.ndarray) else list(column)
+                anchor.set(array)
+            self.run_loop(incremental=True)
+            
+            results = {}
+            for key, anchor in collected.items():
+                if not anchor.status:
+                    results[key] = [None] * rows
+                elif isinstance(anchor.value, np.ndarray):
+                    results[key] = np.broadcast_to(anchor.value, (rows,)).tolist()
+                else:
+                    results[key] = [anchor.value] * rows
+            return results
+        
+        except Exception: # Not as vectorized as it claimed, row by row then
+            return None
+    
+    def stream(self,
+            sources: list[str | Output],
+            outputs: list[str | Output],
+        ) -> typing.Iterator[dict[str | Output, any]]:
+        """Pushes each item of the sources through the blocks reading them.
+        
+        Sources are outputs holding an iterable, from a config or a block. What
+        is upstream of them runs once as usual, what is downstream per item.
+        """
+        from jabuti.core.stream import pipeline
+        
+        anchors = [self.anchor(key) for key in sources]
+        collected = {key: self.anchor(key) for key in outputs}
+        
+        plan = self.get_plan()
+        readers = [link.nextref.block for anchor in anchors for link in anchor.links]
+        streamed = self.downstream(readers)
+        if any(anchor.block in streamed for anchor in anchors):
+            raise Exception(f"A source can't be downstream of another source")
+        if not any(a in anchors or a.block in streamed for a in collected.values()):
+            raise Exception(f"None of the outputs depends on the sources")
+        
+        self.reset_blocks([block for block in plan if block not in streamed])
+        self.run_targets()
+        
+        # Streamed blocks were left out of the run, the next one can't be partial
+        self.config_values = None
+        return pipeline(anchors, [block for block in plan if block in streamed], collected)
+    
+    def compile(self,
+            outputs: list[str | Output],
+            params: list[str | Output] = None,
+        ) -> typing.Callable[..., dict[str | Output, any]]:
+        """A plain function computing `outputs`, taking the `params` config values."""
+        from jabuti.core.compiler import compile_flow
+        return compile_flow(self, outputs, params)
+    
+    def export_module(self,
+            path: str,
+            outputs: list[str],
+            params: list[str] = None,
+        ) -> str:
+        """Writes the flow as a standalone module, see RunSystem.compile."""
+        from jabuti.core.compiler import export_module
+        return export_module(self, path, outputs, params)
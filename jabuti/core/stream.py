@@ -0,0 +1,131 @@
+import itertools
+from typing import Any, Iterable, Iterator
+from jabuti.core.block import Block
+from jabuti.core.anchor import Input, Output
+
+
+
+# An item a block did not produce, everything downstream skips it as well
+SKIP = object()
+
+
+def gather(values: tuple, flag: bool = False) -> Any:
+    """Joins one item from every link, the same way Input.check does."""
+    if len(values) == 1:
+        return values[0]
+    
+    flat = []
+    for value in values:
+        if not isinstance(value, (list, set, tuple)):
+            value = [value]
+        flat.extend(value)
+    
+    if flag:
+        return all(flat)
+    return flat
+
+
+def upstream(blocks: Iterable[Block], members: set[Block]) -> set[Block]:
+    """The given blocks and all the members they read from, directly or not."""
+    found: set[Block] = set()
+    stack = [block for block in blocks if block in members]
+    while stack:
+        block = stack.pop()
+        if block in found:
+            continue
+        found.add(block)
+        for input in block.iter_inputs():
+            stack.extend(l.backref.block for l in input.links if l.backref.block in members)
+    return found
+
+
+def block_stage(block: Block, streams: dict[Input, list[Iterator]]) -> Iterator[dict[str, Any]]:
+    """Runs the block once per item, yielding the mapped results or SKIP."""
+    watched = list(block.inputs.values())
+    if block.enabler.links:
+        watched.append(block.enabler)
+    enabled = block.enabler.value
+    
+    # One tuple per anchor, holding the item of each of its links
+    joined = [zip(*streams[anchor]) for anchor in watched]
+    for items in zip(*joined):
+        if any(value is SKIP for linked in items for value in linked):
+            yield SKIP
+            continue
+        
+        values = {
+            anchor: gather(linked, anchor.vtype == "flag")
+            for anchor, linked in zip(watched, items)
+        }
+        if not values.get(block.enabler, enabled):
+            yield SKIP
+            continue
+        
+        params = {input.name: values[input] for input in block.inputs.values()}
+        yield block.map_result(block.execute(params))
+
+
+def output_stream(output: Output, stage: Iterator[dict[str, Any]]) -> Iterator[Any]:
+    if output is output.block.runflag:
+        return (SKIP if res is SKIP else True for res in stage)
+    return (SKIP if res is SKIP else res.get(output.name, SKIP) for res in stage)
+
+
+def pipeline(
+        sources: list[Output],
+        streamed: list[Block],
+        collected: dict[Any, Output],
+    ) -> Iterator[dict[Any, Any]]:
+    """Chains one generator per streamed block, fed by the source iterables.
+    
+    Every stream is pulled in lockstep by the collected outputs, so each tee
+    between a producer and its consumers holds at most a single item.
+    """
+    members = set(streamed)
+    sources = set(sources)
+    
+    # Only what leads to a collected output is built, a consumer that is never
+    # pulled would make its tee buffer grow without end
+    needed = upstream([output.block for output in collected.values()], members)
+    streamed = [block for block in streamed if block in needed]
+    
+    # How many iterators each output, and each stage, must hand out
+    consumers: dict[Output, int] = {output: 0 for output in collected.values()}
+    for block in streamed:
+        for input in block.iter_inputs():
+            for link in input.links:
+                consumers[link.backref] = consumers.get(link.backref, 0) + 1
+    for output in collected.values():
+        consumers[output] += 1
+    
+    users: dict[Block, int] = {}
+    for output in consumers:
+        if output.block in needed:
+            users[output.block] = users.get(output.block, 0) + 1
+    
+    handed: dict[Output, list[Iterator]] = {}
+    def take(output: Output) -> Iterator:
+        if output.block not in needed and output not in sources:
+            # Same value for every item, computed before streaming
+            return itertools.repeat(output.value if output.status else SKIP)
+        
+        if output not in handed:
+            if output in sources:
+                stream = iter(output.value)
+            else:
+                stream = output_stream(output, stages[output.block].pop())
+            handed[output] = list(itertools.tee(stream, consumers[output]))
+        return handed[output].pop()
+    
+    stages: dict[Block, list[Iterator]] = {}
+    for block in streamed:
+        streams = {}
+        for input in block.iter_inputs():
+            # An input without links never gets a value, so the block never runs
+            streams[input] = [take(link.backref) for link in input.links] or [itertools.repeat(SKIP)]
+        stages[block] = list(itertools.tee(block_stage(block, streams), users[block]))
+    
+    keys = list(collected.keys())
+    outputs = [take(output) for output in collected.values()]
+    for items in zip(*outputs):
+        yield {key: None if value is SKIP else value for key, value in zip(keys, items)}
@@ -0,0 +1,129 @@
+"""Compact binary flows, the same data as RunSystem._export in fewer bytes.
+    
+    header  MAGIC, version, then the byte size of the names and the extras
+            and how many blocks and links follow
+    names   utf-8, one per line: block keys, link keys, then links as 'b1<x-b2>num'
+    extras  json of the class names and of what is not a class or a link,
+            like the block params
+    classes uint32 per block, its index in the class names, little endian
+
+Saving and loading are mostly joins and splits done by python in one go, a
+call per block or link would cost more than the json they replace.
+loads(dumps(data)) gives back the same data.
+"""
+import sys
+import json
+import array
+import struct
+import typing
+import itertools
+
+
+
+MAGIC = b"JBFLOW"
+VERSION = 2
+EXTENSION = "jbf"
+HEADER = struct.Struct("<6sHIIII")
+
+
+def is_binflow(path: str) -> bool:
+    try:
+        with open(path, "rb") as inbin:
+            return inbin.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def split_link(link_data: str) -> tuple[str, str, str, str]:
+    """'b1<x-b2>num' as ('b1', 'x', 'b2', 'num')."""
+    try:
+        a0, a1 = link_data.split('-')
+        bk0, an0 = a0.split('<')
+        bk1, an1 = a1.split('>')
+    except ValueError:
+        raise Exception(f"Link '{link_data}' can't be stored, it should look like 'b1<x-b2>num'")
+    return bk0, an0, bk1, an1
+
+
+def join_links(links: typing.Iterable[str | tuple]) -> list[str]:
+    """Every link as 'b1<x-b2>num', also those already split in tuples."""
+    return [l if isinstance(l, str) else "{}<{}-{}>{}".format(*l) for l in links]
+
+
+def dumps(data: dict[str, dict]) -> bytes:
+    blocks: dict[str, dict] = data["blocks"]
+    links: dict[str, str | tuple] = data["links"]
+    nblocks, nlinks = len(blocks), len(links)
+    
+    values = list(links.values())
+    try:
+        text = '\n'.join(itertools.chain(blocks, links, values))
+    except TypeError: # Some links were already split
+        values = join_links(values)
+        text = '\n'.join(itertools.chain(blocks, links, values))
+    
+    # Counted over all the text at once, a name with a line break would shift
+    # every name after it, a link of the wrong shape has the wrong separators
+    if text.count('\n') != max(nblocks + 2*nlinks - 1, 0):
+        raise Exception(f"Names can't be stored, one of them has a line break")
+    start = sum(map(len, blocks)) + sum(map(len, links)) + nblocks + nlinks
+    if not text.count('<', start) == text.count('-', start) == text.count('>', start) == nlinks:
+        for link_data in values:
+            split_link(link_data)
+        raise Exception(f"Links can't be stored, they should look like 'b1<x-b2>num'")
+    
+    names = [block_data["class"] for block_data in blocks.values()]
+    classes = {name: i for i, name in enumerate(dict.fromkeys(names))}
+    table = array.array('I', map(classes.__getitem__, names))
+    if sys.byteorder == "big":
+        table.byteswap()
+    
+    # Only blocks with more than a class, like configs and their params
+    extras = [
+        [i, {k: v for k, v in block_data.items() if k != "class"}]
+        for i, block_data in enumerate(blocks.values()) if len(block_data) > 1
+    ]
+    other = {k: v for k, v in data.items() if k not in ("blocks", "links")}
+    extra = json.dumps({"data": other, "classes": list(classes), "blocks": extras}, separators=(',', ':')).encode()
+    
+    encoded = text.encode()
+    header = HEADER.pack(MAGIC, VERSION, len(encoded), len(extra), nblocks, nlinks)
+    return b''.join((header, encoded, extra, table.tobytes()))
+
+
+def loads(raw: bytes) -> dict[str, dict]:
+    """The flow stored by dumps."""
+    magic, version, ntext, nextra, nblocks, nlinks = HEADER.unpack_from(raw)
+    if magic != MAGIC:
+        raise Exception(f"Not a binary flow")
+    if version != VERSION:
+        raise Exception(f"Binary flow version {version} can't be read, this jabuti reads version {VERSION}")
+    
+    pos = HEADER.size
+    text = raw[pos:pos+ntext].decode()
+    pos += ntext
+    extra = json.loads(raw[pos:pos+nextra])
+    pos += nextra
+    table = array.array('I')
+    table.frombytes(raw[pos:pos + nblocks*table.itemsize])
+    if sys.byteorder == "big":
+        table.byteswap()
+    
+    names = text.split('\n') if nblocks + nlinks else []
+    keys = names[:nblocks]
+    data = extra["data"]
+    data["blocks"] = dict(zip(keys, [{"class": name} for name in map(extra["classes"].__getitem__, table)]))
+    for i, rest in extra["blocks"]:
+        data["blocks"][keys[i]].update(rest)
+    data["links"] = dict(zip(names[nblocks:nblocks+nlinks], names[nblocks+nlinks:]))
+    return data
+
+
+def dump(data: dict[str, dict], path: str) -> None:
+    with open(path, "wb") as outbin:
+        outbin.write(dumps(data))
+
+
+def load(path: str) -> dict[str, dict]:
+    with open(path, "rb") as inbin:
+        return loads(inbin.read())
@@ -1,12 +1,23 @@
 import os
 import sys
+import json
 import types
 import typing
+import hashlib
 import inspect
 import importlib.util
 
 
 
+# Classes found on paths so far, shared by every RunSystem of the process
+_registry: dict[str, dict[str, typing.Any]] = {}
+
+# What is known of every file already looked at, by its path
+_described: dict[str, dict[str, typing.Any]] = {}
+
+MANIFEST = "jabuti-registry.json"
+
+
 def load_module(name: str, path: str) -> types.ModuleType:
     spec = importlib.util.spec_from_file_location(name, path)
     module = importlib.util.module_from_spec(spec)
@@ -28,6 +39,16 @@ def find_module_classes(module: types.ModuleType) -> list[typing.Type]:
 
 def find_path_module_classes(path: str) -> list[typing.Type]:
     all_classes = []
+    for module_name, file_path in walk_path_modules(path):
+        module = load_module(module_name, file_path)
+        classes = find_module_classes(module)
+        all_classes.extend(classes)
+    
+    return all_classes
+
+
+def walk_path_modules(path: str) -> typing.Iterator[tuple[str, str]]:
+    """Every python file under `path`, with the module name it is loaded as."""
     for root, _, files in os.walk(path):
         if "__pycache__" in root:
             continue
@@ -36,16 +57,104 @@ def find_path_module_classes(path: str) -> list[typing.Type]:
         module_name = cln_root.removeprefix('./').removesuffix('/').replace('/', '.')
         root_path = cln_root.removesuffix('/')
         
-        for file in files:
+        for file in sorted(files):
+            if not file.endswith('.py'):
+                continue
             file_name = file.removesuffix('.py')
-            scope = f"{module_name}.{file_name}"
-            file_path = f"{root_path}/{file}"
-            
-            module = load_module(scope, file_path)
-            classes = find_module_classes(module)
-            all_classes.extend(classes)
+            yield f"{module_name}.{file_name}", f"{root_path}/{file}"
+
+
+def file_hash(file_path: str) -> str:
+    with open(file_path, "rb") as inpy:
+        return hashlib.blake2b(inpy.read(), digest_size=16).hexdigest()
+
+
+def load_manifest(path: str) -> dict[str, dict[str, typing.Any]]:
+    try:
+        with open(os.path.join(path, "__pycache__", MANIFEST)) as injson:
+            return json.load(injson)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(path: str, entries: dict[str, dict[str, typing.Any]]) -> None:
+    folder = os.path.join(path, "__pycache__")
+    temp_path = os.path.join(folder, f"{MANIFEST}.{os.getpid()}.tmp")
+    try:
+        os.makedirs(folder, exist_ok=True)
+        with open(temp_path, "w") as outjson:
+            json.dump(entries, outjson, indent=1)
+        os.replace(temp_path, os.path.join(folder, MANIFEST))
+    except OSError: # Read only, the next process will just look again
+        pass
+
+
+def find_path_registry(path: str) -> dict[str, dict[str, typing.Any]]:
+    """Describes the classes under `path`, only running new or changed files.
     
-    return all_classes
+    Files are told apart by mtime and size, then by a hash of their content.
+    What was found is kept in the manifest of the folder, so the classes of
+    unchanged files are only imported when load_class asks for them.
+    """
+    if not os.path.isdir(path):
+        return {}
+    
+    manifest = load_manifest(path)
+    entries: dict[str, dict[str, typing.Any]] = {}
+    clsdesc: dict[str, dict[str, typing.Any]] = {}
+    changed = False
+    
+    for module_name, file_path in walk_path_modules(path):
+        relpath = os.path.relpath(file_path, path)
+        stat = os.stat(file_path)
+        stamp = [stat.st_mtime_ns, stat.st_size]
+        
+        entry = _described.get(file_path)
+        if entry is None or entry["module"] != module_name:
+            entry = manifest.get(relpath)
+        if entry is not None and entry["module"] != module_name:
+            entry = None
+        
+        if entry is None or entry["stamp"] != stamp:
+            digest = file_hash(file_path)
+            if entry is None or entry["hash"] != digest:
+                # New or edited, the only case where the file is run right away
+                module = load_module(module_name, file_path)
+                descs = [describe_class(cls) for cls in find_module_classes(module)]
+                for desc in descs:
+                    _registry[desc["full"]] = {**desc, "file": file_path}
+                entry = {
+                    "module": module_name,
+                    "hash": digest,
+                    "classes": [{k: v for k, v in d.items() if k != "class"} for d in descs],
+                }
+            entry = {**entry, "stamp": stamp}
+            changed = True
+        
+        _described[file_path] = entry
+        entries[relpath] = entry
+        
+        for desc in entry["classes"]:
+            known = _registry.get(desc["full"])
+            if known is None or known["file"] != file_path:
+                known = {**desc, "file": file_path, "class": None}
+                _registry[desc["full"]] = known
+            clsdesc[desc["full"]] = known
+    
+    if changed or entries.keys() != manifest.keys():
+        save_manifest(path, entries)
+    return clsdesc
+
+
+def load_class(desc: dict[str, typing.Any]) -> typing.Type:
+    """The class of a description, importing its module the first time."""
+    if desc.get("class") is None:
+        module_name = _described[desc["file"]]["module"]
+        module = sys.modules.get(module_name)
+        if module is None:
+            module = load_module(module_name, desc["file"])
+        desc["class"] = getattr(module, desc["name"])
+    return desc["class"]
 
 
 def describe_class(cls: typing.Type) -> dict[str, str]:
@@ -72,8 +181,8 @@ def find_full_classes(
     
     for mop in module_or_path:
         if isinstance(mop, str):
-            cls = find_path_module_classes(mop)
-            classes.extend(cls)
+            # Descriptions are shared, a class loaded once is loaded for all
+            clsdesc.update(find_path_registry(mop))
         elif isinstance(mop, types.ModuleType):
             cls = find_module_classes(mop)
             classes.extend(cls)
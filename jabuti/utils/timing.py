@@ -0,0 +1,52 @@
+import time
+import typing
+if typing.TYPE_CHECKING:
+    from jabuti.core.runsys import RunSystem
+
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Linear interpolation between the closest ranks, `q` from 0 to 100."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    pos = (len(ordered) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Latency figures of a list of durations in seconds, given in milliseconds."""
+    total = sum(samples)
+    return {
+        "runs": len(samples),
+        "total_ms": total * 1000,
+        "mean_ms": total / len(samples) * 1000 if samples else 0.0,
+        "min_ms": min(samples, default=0.0) * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p90_ms": percentile(samples, 90) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples, default=0.0) * 1000,
+        "runs_per_s": len(samples) / total if total else 0.0,
+    }
+
+
+def time_runs(
+        runsys: "RunSystem",
+        repeat: int = 1,
+        warmup: int = 0,
+        executor: typing.Literal["serial", "threads", "processes"] = "serial",
+    ) -> list[float]:
+    """Duration of each full run_loop, the warmup runs are not kept anywhere."""
+    for _ in range(warmup):
+        runsys.run_loop(executor)
+    if runsys.monitor is not None:
+        runsys.monitor.clear()
+    
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        runsys.run_loop(executor)
+        samples.append(time.perf_counter() - start)
+    return samples
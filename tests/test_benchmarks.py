@@ -0,0 +1,43 @@
+import unittest
+import jabuti as jb
+from benchmarks.graphs import GRAPHS, chain
+from benchmarks.suite import compare, measure
+
+
+
+class TestGraphs(unittest.TestCase):
+    def test_run(self):
+        for name, graph in GRAPHS.items():
+            with self.subTest(graph=name):
+                runsys = jb.RunSystem()
+                runsys.setup(**graph(40))
+                runsys.run_loop()
+                
+                ran = [block for block in runsys.blocks.values() if block.status]
+                self.assertEqual(len(ran), len(runsys.blocks))
+    
+    def test_flags(self):
+        runsys = jb.RunSystem()
+        runsys.setup(**chain(5, flags=True))
+        self.assertEqual(len(runsys.links), 9)
+        
+        runsys.run_loop()
+        self.assertEqual(runsys["b5<abs"].value, 1)
+    
+    def test_measure(self):
+        result = measure("diamond", 20, repeat=1, memory=False)
+        self.assertEqual(result["blocks"], 21)
+        self.assertNotIn("peak_mb", result)
+    
+    def test_compare(self):
+        old = {"results": [{"graph": "chain", "size": 10, "setup_ms": 1.0, "run_ms": 1.0}]}
+        new = {"results": [{"graph": "chain", "size": 10, "setup_ms": 2.0, "run_ms": 1.1}]}
+        
+        slower = compare(old, new)
+        self.assertEqual(len(slower), 1)
+        self.assertIn("setup_ms", slower[0])
+
+
+
+if __name__ == "__main__":
+    unittest.main()
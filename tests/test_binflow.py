@@ -0,0 +1,97 @@
+import os
+import random
+import unittest
+import tempfile
+import jabuti as jb
+from jabuti.utils import binflow
+
+
+
+FLOW = {
+    "blocks": {
+        "b1": {"class": "jabuti.builtin.config.Config", "params": {"values": {"x": -4, "y": [1, 2.5]}}},
+        "b2": {"class": "jabuti.builtin.math.Abs"},
+        "b3": {"class": "jabuti.builtin.math.Sum"},
+    },
+    "links": {
+        "l1": "b1<x-b2>num",
+        "l2": "b2<abs-b3>nums",
+        "l3": "b1<y-b3>nums",
+        "l4": "b2<runflag-b3>enabler",
+    },
+}
+
+
+def random_flow(size: int, seed: int) -> dict[str, dict]:
+    """Sum blocks reading from two or three random blocks made before them."""
+    rng = random.Random(seed)
+    blocks = {"b0": {"class": "jabuti.builtin.config.Config", "params": {"values": {"x": 1, "y": 2}}}}
+    links = {}
+    sources = ["b0<x", "b0<y"]
+    for i in range(1, size + 1):
+        blocks[f"b{i}"] = {"class": "jabuti.builtin.math.Sum"}
+        for output in rng.sample(sources, rng.randint(2, 3) if len(sources) > 2 else 2):
+            links[f"l{len(links) + 1}"] = f"{output}-b{i}>nums"
+        sources.append(f"b{i}<sum")
+    return {"blocks": blocks, "links": links}
+
+
+class TestBinflow(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.temp.cleanup()
+    
+    def path(self, name: str) -> str:
+        return os.path.join(self.temp.name, name)
+    
+    def test_loads(self):
+        self.assertEqual(binflow.loads(binflow.dumps(FLOW)), FLOW)
+        
+        # Links already split are stored the same way
+        split = {**FLOW, "links": {k: binflow.split_link(v) for k, v in FLOW["links"].items()}}
+        self.assertEqual(binflow.dumps(split), binflow.dumps(FLOW))
+        self.assertEqual(binflow.loads(binflow.dumps({"blocks": {}, "links": {}})), {"blocks": {}, "links": {}})
+    
+    def test_round_trip(self):
+        runsys = jb.RunSystem()
+        runsys.setup(**random_flow(200, seed=3))
+        runsys.to_file(self.path("flow.jbf"))
+        runsys.to_file(self.path("flow.json"))
+        
+        loaded = jb.RunSystem.from_file(self.path("flow.jbf"))
+        self.assertEqual(loaded._export(), runsys._export())
+        self.assertEqual(loaded._export(), jb.RunSystem.from_file(self.path("flow.json"))._export())
+        self.assertLess(os.path.getsize(self.path("flow.jbf")), os.path.getsize(self.path("flow.json")))
+    
+    def test_run(self):
+        runsys = jb.RunSystem()
+        runsys.setup(**FLOW)
+        runsys.to_file(self.path("flow.jbf"))
+        
+        loaded = jb.RunSystem.from_file(self.path("flow.jbf"))
+        loaded.run_loop()
+        self.assertEqual(loaded["b3<sum"].value, 7.5)
+        self.assertEqual(loaded.counts, {"block": 3, "link": 4})
+    
+    def test_magic(self):
+        with open(self.path("flow.bin"), "wb") as outbin:
+            outbin.write(binflow.dumps(FLOW))
+        self.assertTrue(binflow.is_binflow(self.path("flow.bin")))
+        self.assertEqual(len(jb.RunSystem.from_file(self.path("flow.bin")).links), 4)
+    
+    def test_bad(self):
+        with self.assertRaises(Exception):
+            binflow.loads(b"JBFLAW" + bytes(18))
+        with self.assertRaises(Exception):
+            binflow.dumps({"blocks": {}, "links": {"l1": "b1-b2"}})
+        with self.assertRaises(Exception):
+            binflow.dumps({"blocks": {"b\n1": {"class": "jabuti.builtin.math.Abs"}}, "links": {}})
+        with self.assertRaises(Exception):
+            jb.RunSystem().to_file(self.path("flow.txt"))
+
+
+
+if __name__ == "__main__":
+    unittest.main()
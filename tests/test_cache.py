@@ -0,0 +1,254 @@
+import os
+import sys
+import unittest
+import tempfile
+import threading
+import subprocess
+import jabuti as jb
+from jabuti.core.cache import result_key
+
+
+
+class TestResultCache(unittest.TestCase):
+    def test_lru(self):
+        cache = jb.ResultCache(max_items=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        
+        self.assertEqual(cache.get("a"), (True, 1))
+        self.assertEqual(cache.get("b"), (False, None))
+        self.assertEqual(len(cache), 2)
+    
+    def test_bytes(self):
+        cache = jb.ResultCache(max_items=None, max_bytes=64)
+        cache.put("a", "x" * 30)
+        cache.put("b", "y" * 30)
+        cache.put("c", "z" * 1000)
+        
+        self.assertLessEqual(cache.size, 64)
+        self.assertEqual(cache.get("a"), (False, None))
+        self.assertEqual(cache.get("c"), (False, None))
+    
+    def test_key(self):
+        b1 = jb.builtin.Abs()
+        b2 = jb.builtin.Abs()
+        b3 = jb.builtin.Sqrt()
+        
+        self.assertEqual(result_key(b1, {"num": 1}), result_key(b2, {"num": 1}))
+        self.assertNotEqual(result_key(b1, {"num": 1}), result_key(b1, {"num": 2}))
+        self.assertNotEqual(result_key(b1, {"num": 1}), result_key(b3, {"num": 1}))
+        self.assertIsNone(result_key(b1, {"num": lambda: 1}))
+    
+    def test_constants(self):
+        # Same instructions, only the constants differ
+        c1 = jb.BlockConfig({"x": 10})
+        b1 = jb.AutoBlock(lambda x: x + 1, {"y": int})
+        b2 = jb.AutoBlock(lambda x: x + 2, {"y": int})
+        c1["<x"].link_with(b1[">x"])
+        c1["<x"].link_with(b2[">x"])
+        
+        runsys = jb.RunSystem()
+        for b in [c1, b1, b2]:
+            runsys.add_block(b)
+        runsys.set_cache(jb.ResultCache())
+        runsys.run_loop()
+        
+        self.assertEqual(b1["<y"].value, 11)
+        self.assertEqual(b2["<y"].value, 12)
+    
+    def test_captured(self):
+        def make(step, scale=1):
+            def func(num: float):
+                return (num + step) * scale
+            return func
+        
+        def key(function):
+            return result_key(jb.AutoBlock(function), {"num": 1})
+        
+        self.assertEqual(key(make(1)), key(make(1)))
+        self.assertNotEqual(key(make(1)), key(make(2)))
+        self.assertNotEqual(key(make(1)), key(make(1, 2)))
+        
+        # Can't be pickled, only the in memory cache takes it, by the function
+        cache = jb.ResultCache()
+        f1, f2 = make(threading.Lock()), make(threading.Lock())
+        self.assertIsNone(key(f1))
+        self.assertEqual(cache.key(jb.AutoBlock(f1), {"num": 1}), cache.key(jb.AutoBlock(f1), {"num": 1}))
+        self.assertNotEqual(cache.key(jb.AutoBlock(f1), {"num": 1}), cache.key(jb.AutoBlock(f2), {"num": 1}))
+
+
+class TestRunCache(unittest.TestCase):
+    def setUp(self):
+        self.calls = 0
+        def func(num: float):
+            self.calls += 1
+            return num * 2
+        
+        self.c1 = jb.BlockConfig({"x": 1, "y": 1})
+        self.b1 = jb.AutoBlock(func, {"out": float})
+        self.b2 = jb.AutoBlock(func, {"out": float})
+        self.c1["<x"].link_with(self.b1[">num"])
+        self.c1["<y"].link_with(self.b2[">num"])
+        
+        self.runsys = jb.RunSystem()
+        for b in [self.c1, self.b1, self.b2]:
+            self.runsys.add_block(b)
+    
+    def test_hits(self):
+        cache = jb.ResultCache()
+        self.runsys.set_cache(cache)
+        for executor in ["serial", "threads", "processes", "async"]:
+            self.runsys.run_loop(executor)
+        
+        # Same function and inputs, only the very first call is made
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(cache.stats()["hits"], 7)
+        self.assertEqual(cache.stats()["misses"], 1)
+        self.assertEqual(self.b2["<out"].value, 2)
+    
+    def test_only(self):
+        self.runsys.set_cache(jb.ResultCache(), blocks=[3])
+        self.runsys.run_loop()
+        self.runsys.run_loop()
+        
+        self.assertEqual(self.calls, 3)
+        self.assertIsNone(self.b1.cache)
+
+
+SCALE = '''
+from jabuti.core.block import AutoBlock
+
+class Scale(AutoBlock):
+    def __init__(self) -> None:
+        def func(num: float):
+            return num * {factor}
+        super().__init__(func, {{"scaled": float}})
+'''
+
+# Same code every time, only the module constant read by the helper changes
+SCALE_CONSTANT = '''
+from jabuti.core.block import AutoBlock
+
+FACTOR = {factor}
+
+def scale(num):
+    return num * FACTOR
+
+class Scale(AutoBlock):
+    def __init__(self) -> None:
+        def func(num: float):
+            return scale(num)
+        super().__init__(func, {{"scaled": float}})
+'''
+
+RUN = '''
+import sys
+import jabuti as jb
+runsys = jb.RunSystem()
+runsys.setup(
+    blocks={{
+        "b1": {{"class": "jabuti.builtin.config.Config", "params": {{"values": {{"x": 5}}}}}},
+        "b2": {{"class": "custom.scale.Scale"}},
+    }},
+    links={{"l1": "b1<x-b2>num"}},
+)
+runsys.set_cache(jb.DiskCache({cache!r}))
+runsys.run_loop()
+print(runsys["b2<scaled"].value)
+'''
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.flow = {
+            "blocks": {
+                "b1": {"class": "jabuti.builtin.config.Config", "params": {"values": {"x": -4}}},
+                "b2": {"class": "jabuti.builtin.math.Abs"},
+                "b3": {"class": "jabuti.builtin.math.Sqrt"},
+            },
+            "links": {
+                "l1": "b1<x-b2>num",
+                "l2": "b2<abs-b3>num",
+            },
+        }
+    
+    def tearDown(self):
+        self.temp.cleanup()
+    
+    def run_flow(self, cache: jb.DiskCache) -> jb.RunSystem:
+        runsys = jb.RunSystem()
+        runsys.setup(**self.flow)
+        runsys.set_cache(cache)
+        runsys.run_loop()
+        return runsys
+    
+    def test_reuse(self):
+        self.run_flow(jb.DiskCache(self.temp.name))
+        
+        # A new cache on the same folder, as a new process would make
+        cache = jb.DiskCache(self.temp.name)
+        runsys = self.run_flow(cache)
+        
+        self.assertEqual(cache.stats()["hits"], 2)
+        self.assertEqual(cache.stats()["misses"], 0)
+        self.assertEqual(runsys["b3<sqrt"].value, 2)
+    
+    def test_invalidate(self):
+        cache = jb.DiskCache(self.temp.name)
+        self.run_flow(cache)
+        cache.invalidate(jb.builtin.Sqrt)
+        self.run_flow(cache)
+        
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 3)
+    
+    def test_evict(self):
+        cache = jb.DiskCache(self.temp.name, max_bytes=100)
+        for i in range(10):
+            cache.put(f"k/{i}", "x" * 30)
+        
+        self.assertLessEqual(cache.size, 100)
+        self.assertEqual(cache.get("k/0"), (False, None))
+        self.assertEqual(cache.get("k/9"), (True, "x" * 30))
+    
+    def test_edited(self):
+        # A custom block changed between two processes sharing the cache
+        work = os.path.join(self.temp.name, "work")
+        os.makedirs(os.path.join(work, "custom"))
+        script = RUN.format(cache=os.path.join(self.temp.name, "cache"))
+        env = dict(os.environ, PYTHONPATH=os.getcwd())
+        
+        def run(factor: int) -> str:
+            with open(os.path.join(work, "custom", "scale.py"), "w") as outpy:
+                outpy.write(SCALE.format(factor=factor))
+            proc = subprocess.run([sys.executable, "-c", script], cwd=work, env=env, capture_output=True, text=True)
+            return proc.stdout.strip()
+        
+        self.assertEqual(run(2), "10")
+        self.assertEqual(run(3), "15")
+        self.assertEqual(run(3), "15")
+    
+    def test_edited_constant(self):
+        work = os.path.join(self.temp.name, "work")
+        os.makedirs(os.path.join(work, "custom"))
+        script = RUN.format(cache=os.path.join(self.temp.name, "cache"))
+        env = dict(os.environ, PYTHONPATH=os.getcwd(), PYTHONDONTWRITEBYTECODE="1")
+        
+        def run(factor: int) -> str:
+            with open(os.path.join(work, "custom", "scale.py"), "w") as outpy:
+                outpy.write(SCALE_CONSTANT.format(factor=factor))
+            proc = subprocess.run([sys.executable, "-c", script], cwd=work, env=env, capture_output=True, text=True)
+            return proc.stdout.strip()
+        
+        self.assertEqual(run(2), "10")
+        self.assertEqual(run(3), "15")
+        self.assertEqual(run(2), "10")
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import sys
+import json
+import unittest
+import tempfile
+import subprocess
+import jabuti as jb
+from jabuti.utils.timing import percentile, summarize
+
+
+
+FLOW = {
+    "blocks": {
+        "b1": {"class": "jabuti.builtin.config.Config", "params": {"values": {"x": -4}}},
+        "b2": {"class": "jabuti.builtin.math.Abs"},
+        "b3": {"class": "jabuti.builtin.math.Sqrt"},
+    },
+    "links": {
+        "l1": "b1<x-b2>num",
+        "l2": "b2<abs-b3>num",
+    },
+}
+
+
+class TestRun(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp.name, "flow.json")
+        with open(self.path, "w") as outjson:
+            json.dump(FLOW, outjson)
+    
+    def tearDown(self):
+        self.temp.cleanup()
+    
+    def jabuti(self, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run([sys.executable, "-m", "jabuti", *args], capture_output=True, text=True)
+    
+    def test_json_stats(self):
+        proc = self.jabuti("--run", "-f", self.path, "--repeat", "5", "--warmup", "2", "--json-stats")
+        stats = json.loads(proc.stdout)
+        
+        self.assertEqual(stats["runs"], 5)
+        self.assertEqual(stats["executor"], "serial")
+        self.assertLessEqual(stats["p50_ms"], stats["p99_ms"])
+    
+    def test_missing(self):
+        proc = self.jabuti("--run", "-f", os.path.join(self.temp.name, "nope.json"))
+        self.assertEqual(proc.returncode, 1)
+    
+    def test_toml(self):
+        from jabuti.utils.toml import obj_to_toml
+        
+        path = os.path.join(self.temp.name, "flow.toml")
+        with open(path, "w") as outtoml:
+            outtoml.write(obj_to_toml(FLOW))
+        runsys = jb.RunSystem.from_file(path)
+        runsys.run_loop()
+        
+        self.assertEqual(runsys["b3<sqrt"].value, 2)
+
+
+class TestStats(unittest.TestCase):
+    def test_percentile(self):
+        samples = [4, 1, 3, 2]
+        
+        self.assertEqual(percentile(samples, 0), 1)
+        self.assertEqual(percentile(samples, 50), 2.5)
+        self.assertEqual(percentile(samples, 100), 4)
+    
+    def test_summarize(self):
+        stats = summarize([0.1, 0.3])
+        
+        self.assertAlmostEqual(stats["mean_ms"], 200)
+        self.assertAlmostEqual(stats["runs_per_s"], 5)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import sys
+import tempfile
+import unittest
+import importlib.util
+import jabuti as jb
+from tests.test_runsys import build_lvl4
+
+
+
+class TestCompile(unittest.TestCase):
+    def test_lvl4(self):
+        runsys, (c1, b1, b2, b3, b4) = build_lvl4()
+        flow = runsys.compile([b3["<result"], b4["<inv"]], [c1["<x1"]])
+        res = flow()
+        
+        self.assertAlmostEqual(res[b3["<result"]], 5.3571, 4)
+        self.assertEqual(res[b4["<inv"]], -75)
+        self.assertEqual(flow(20)[b4["<inv"]], -85)
+        self.assertEqual(flow(p0=0)[b4["<inv"]], -65)
+    
+    def test_same_as_run(self):
+        runsys = jb.RunSystem()
+        runsys.setup(
+            blocks={
+                "b1": {"class": "jabuti.builtin.config.Config", "params": {"values": {"x": 7, "y": 2}}},
+                "b2": {"class": "jabuti.builtin.math.Div"},
+                "b3": {"class": "jabuti.builtin.bool.Cmp"},
+                "b4": {"class": "jabuti.builtin.math.Abs"},
+                "b5": {"class": "jabuti.builtin.math.Sum"},
+            },
+            links={
+                "l1": "b1<x-b2>num",
+                "l2": "b1<y-b2>den",
+                "l3": "b1<x-b3>x",
+                "l4": "b1<y-b3>y",
+                "l5": "b3<lt-b4>enabler",
+                "l6": "b2<rem-b4>num",
+                "l7": "b2<quo-b5>nums",
+                "l8": "b2<rem-b5>nums",
+            },
+        )
+        outputs = ["b2<div", "b4<abs", "b5<sum", "b4<runflag"]
+        flow = runsys.compile(outputs, ["b1<x"])
+        
+        for x in [7, -3, 0.5]:
+            runsys["b1"].update({"x": x})
+            runsys.run_loop()
+            expected = {k: runsys[k].value if runsys[k].status else None for k in outputs}
+            self.assertEqual(flow(x), expected)
+    
+    def test_async(self):
+        async def func(num: float):
+            return num + 1
+        
+        c1 = jb.BlockConfig({"x": 1})
+        b1 = jb.AutoBlock(func, {"out": float})
+        c1["<x"].link_with(b1[">num"])
+        runsys = jb.RunSystem()
+        for b in [c1, b1]:
+            runsys.add_block(b)
+        
+        self.assertEqual(runsys.compile([b1["<out"]])()[b1["<out"]], 2)
+
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.temp.cleanup()
+    
+    def load(self, runsys: jb.RunSystem, outputs: list[str], params: list[str] = None):
+        path = os.path.join(self.temp.name, "exported.py")
+        runsys.export_module(path, outputs, params)
+        spec = importlib.util.spec_from_file_location("exported", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    
+    def test_builtins(self):
+        runsys = jb.RunSystem()
+        runsys.setup(
+            blocks={
+                "b1": {"class": "jabuti.builtin.config.Config", "params": {"values": {"x": 9, "y": 2}}},
+                "b2": {"class": "jabuti.builtin.math.Pow"},
+                "b3": {"class": "jabuti.builtin.math.Sqrt"},
+            },
+            links={
+                "l1": "b1<x-b2>num",
+                "l2": "b1<y-b2>exp",
+                "l3": "b2<pow-b3>num",
+                "l4": "b2<runflag-b3>enabler",
+            },
+        )
+        module = self.load(runsys, ["b3<sqrt"], ["b1<x"])
+        
+        self.assertNotIn("jabuti", module.__dict__)
+        self.assertEqual(module.PARAMS, ["b1<x"])
+        self.assertEqual(module.flow(), {"b3<sqrt": 9})
+        self.assertEqual(module.flow(4), {"b3<sqrt": 4})
+    
+    def test_closure(self):
+        class Scale(jb.AutoBlock):
+            def __init__(self, factor: float) -> None:
+                def func(num: float):
+                    return sys.getrecursionlimit() and num * factor
+                super().__init__(func, {"out": float})
+        
+        c1 = jb.BlockConfig({"x": 3})
+        b1 = Scale(10)
+        c1["<x"].link_with(b1[">num"])
+        runsys = jb.RunSystem()
+        runsys.blocks.update({"b1": c1, "b2": b1})
+        module = self.load(runsys, ["b2<out"])
+        
+        self.assertEqual(module.flow(), {"b2<out": 30})
+    
+    def test_not_literal(self):
+        c1 = jb.BlockConfig({"x": object()})
+        b1 = jb.builtin.Abs()
+        c1["<x"].link_with(b1[">num"])
+        runsys = jb.RunSystem()
+        runsys.blocks.update({"b1": c1, "b2": b1})
+        
+        with self.assertRaises(Exception):
+            self.load(runsys, ["b2<abs"])
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import sys
+import unittest
+import tempfile
+import jabuti as jb
+from jabuti.utils import finder
+
+
+
+BLOCKS = '''
+import os
+from jabuti.core.block import AutoBlock
+
+with open(os.path.join(os.path.dirname(__file__), "runs.txt"), "a") as outtxt:
+    outtxt.write("x")
+
+class Twice(AutoBlock):
+    def __init__(self) -> None:
+        def func(num: float):
+            return {factor} * num
+        super().__init__(func, {{"twice": float}})
+'''
+
+
+class TestRegistry(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp.name)
+        os.makedirs("custom")
+        self.write(2)
+    
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.temp.cleanup()
+        self.forget()
+    
+    def write(self, factor: int) -> None:
+        with open("custom/blocks.py", "w") as outpy:
+            outpy.write(BLOCKS.format(factor=factor))
+    
+    def runs(self) -> int:
+        with open("custom/runs.txt") as intxt:
+            return len(intxt.read())
+    
+    def forget(self) -> None:
+        # As if it was a new process
+        finder._registry.clear()
+        finder._described.clear()
+        sys.modules.pop("custom.blocks", None)
+    
+    def test_manifest(self):
+        clsdesc = finder.find_path_registry("./custom/")
+        
+        self.assertEqual(self.runs(), 1)
+        self.assertIsNotNone(clsdesc["custom.blocks.Twice"]["class"])
+        self.assertTrue(os.path.isfile(f"custom/__pycache__/{finder.MANIFEST}"))
+        
+        self.forget()
+        clsdesc = finder.find_path_registry("./custom/")
+        self.assertEqual(self.runs(), 1)
+        self.assertIsNone(clsdesc["custom.blocks.Twice"]["class"])
+    
+    def test_lazy(self):
+        finder.find_path_registry("./custom/")
+        self.forget()
+        
+        runsys = jb.RunSystem()
+        jb.RunSystem()
+        self.assertEqual(self.runs(), 1)
+        
+        runsys.setup(
+            blocks={
+                "b1": {"class": "jabuti.builtin.config.Config", "params": {"values": {"x": 4}}},
+                "b2": {"class": "custom.blocks.Twice"},
+                "b3": {"class": "custom.blocks.Twice"},
+            },
+            links={"l1": "b1<x-b2>num", "l2": "b2<twice-b3>num"},
+        )
+        runsys.run_loop()
+        
+        self.assertEqual(self.runs(), 2)
+        self.assertEqual(runsys["b3<twice"].value, 16)
+    
+    def test_changed(self):
+        finder.find_path_registry("./custom/")
+        
+        # Same content, only the mtime moved
+        os.utime("custom/blocks.py", ns=(0, 0))
+        finder.find_path_registry("./custom/")
+        self.assertEqual(self.runs(), 1)
+        
+        self.write(3)
+        clsdesc = finder.find_path_registry("./custom/")
+        self.assertEqual(self.runs(), 2)
+        self.assertEqual(clsdesc["custom.blocks.Twice"]["class"]().function(2), 6)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
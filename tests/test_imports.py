@@ -0,0 +1,29 @@
+import sys
+import unittest
+import subprocess
+
+
+
+class TestLazy(unittest.TestCase):
+    def loaded(self, statement: str) -> set[str]:
+        code = f"import sys; {statement}; print(' '.join(sys.modules))"
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        return set(proc.stdout.split())
+    
+    def test_package(self):
+        modules = self.loaded("import jabuti")
+        
+        for name in ("jabuti.builtin", "jabuti.utils.finder", "jabuti.core.cache", "asyncio", "tkinter"):
+            self.assertNotIn(name, modules)
+    
+    def test_first_use(self):
+        modules = self.loaded("import jabuti; jabuti.builtin.Abs(); jabuti.ResultCache()")
+        
+        self.assertIn("jabuti.builtin", modules)
+        self.assertIn("jabuti.core.cache", modules)
+        self.assertNotIn("tkinter", modules)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -17,6 +17,35 @@ class TestConnection(unittest.TestCase):
         l1 = o1.link_with(i1)
         
         self.assertEqual(i1.value, 42)
+    
+    def test_fanin_order(self):
+        outs = [jb.Output(None, f"o{i}", int, i) for i in range(5)]
+        i1 = jb.Input(None, "i1", list)
+        links = [o.link_with(i1) for o in outs]
+        links[1].unlink()
+        outs[1].link_with(i1)
+        
+        self.assertEqual(i1.value, [0, 2, 3, 4, 1])
+        self.assertEqual(len(i1.links), 5)
+    
+    def test_fanin_arrival(self):
+        outs = [jb.Output(None, f"o{i}", int) for i in range(3)]
+        i1 = jb.Input(None, "i1", list)
+        for o in outs:
+            o.link_with(i1)
+        
+        outs[0].set(1)
+        outs[1].set(2)
+        self.assertFalse(i1.status)
+        
+        # Reset behind the input's back, must not count as arrived
+        outs[0].reset()
+        outs[2].set(3)
+        self.assertFalse(i1.status)
+        
+        outs[0].set(4)
+        self.assertTrue(i1.status)
+        self.assertEqual(i1.value, [4, 2, 3])
 
 
 class TestBuiltins(unittest.TestCase):
@@ -66,6 +95,67 @@ class TestBuiltins(unittest.TestCase):
         b2.run()
         
         self.assertEqual(b2['<neg'].value, -42)
+    
+    def test_signature(self):
+        # Same code, read once and shared, as long as the annotations match
+        def make(_type):
+            def func(num: _type):
+                return num
+            return func
+        
+        b1 = jb.AutoBlock(make(int))
+        b2 = jb.AutoBlock(make(float))
+        b3 = jb.AutoBlock(make(float))
+        self.assertIs(b1[">num"].type, int)
+        self.assertIs(b2[">num"].type, float)
+        self.assertIs(b3[">num"].type, float)
+
+class TestIndexes(unittest.TestCase):
+    def test_anchors(self):
+        c1 = jb.BlockConfig({"x": 10})
+        b1 = jb.builtin.Abs()
+        
+        self.assertEqual(list(c1.anchors), [c1["<x"]])
+        self.assertEqual(set(b1.anchors), {b1[">num"], b1["<abs"], b1["<neg"], b1.enabler, b1.runflag})
+        
+        num = b1[">num"]
+        num.rmv()
+        self.assertNotIn(num, b1.anchors)
+        self.assertNotIn("num", b1.inputs)
+    
+    def test_assigned(self):
+        # Put straight into inputs, as custom blocks may do, found once linked
+        b1 = jb.Block(lambda x: x)
+        b1.inputs["x"] = jb.Input(b1, "x", int)
+        l1 = jb.BlockConfig({"x": 10})["<x"].link_with(b1[">x"])
+        
+        self.assertIn(b1[">x"], b1.anchors)
+        self.assertEqual(list(b1.links), [l1])
+    
+    def test_links(self):
+        c1 = jb.BlockConfig({"x": 10})
+        b1 = jb.builtin.Abs()
+        b2 = jb.builtin.Abs()
+        l1 = c1["<x"].link_with(b1[">num"])
+        l2 = b1["<neg"].link_with(b2[">num"])
+        l3 = b1.runflag.link_with(b2.enabler)
+        
+        self.assertEqual(list(c1.links), [l1])
+        self.assertEqual(list(b1.links), [l1, l2, l3])
+        self.assertEqual(list(b2.links), [l2, l3])
+        
+        l2.unlink()
+        self.assertEqual(list(b1.links), [l1, l3])
+        self.assertEqual(list(b2.links), [l3])
+    
+    def test_loop(self):
+        b1 = jb.builtin.Abs()
+        l1 = b1["<abs"].link_with(b1[">num"])
+        l1.nextref.rmv_link(l1)
+        
+        self.assertIn(l1, b1.links)
+        l1.backref.rmv_link(l1)
+        self.assertNotIn(l1, b1.links)
 
 
 
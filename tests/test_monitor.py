@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import asyncio
+import unittest
+import tempfile
+import jabuti as jb
+from tests.test_runsys import build_lvl4
+
+
+
+class TestMonitor(unittest.TestCase):
+    def test_records(self):
+        runsys, (c1, b1, b2, b3, b4) = build_lvl4()
+        monitor = jb.Monitor(sizes=True)
+        runsys.set_monitor(monitor)
+        runsys.run_loop()
+        runsys.run_loop()
+        
+        report = monitor.report()
+        self.assertEqual(report["loops"], 2)
+        self.assertEqual({b["calls"] for b in report["blocks"]}, {2})
+        self.assertEqual(len(report["blocks"]), 4)
+        
+        record = monitor.records[b1]
+        self.assertEqual(record.key, 4) # registered through add_block
+        self.assertGreater(record.in_bytes, 0)
+        self.assertGreater(record.out_bytes, 0)
+        self.assertIn("BlockSum", monitor.format())
+    
+    def test_selected(self):
+        runsys, (c1, b1, b2, b3, b4) = build_lvl4()
+        runsys.set_monitor(jb.Monitor(), blocks=[4])
+        runsys.run_loop()
+        
+        self.assertEqual(list(runsys.monitor.records), [b1])
+        self.assertEqual(runsys.monitor.records[b1].in_bytes, 0) # sizes are opt-in
+        
+        runsys.set_monitor(None)
+        self.assertIsNone(b1.monitor)
+    
+    def test_slowest(self):
+        def slow(num: float):
+            time.sleep(0.02)
+            return num
+        
+        c1 = jb.BlockConfig({"x": 1})
+        b1 = jb.AutoBlock(slow, {"y": float})
+        b2 = jb.builtin.Abs()
+        c1["<x"].link_with(b1[">num"])
+        b1["<y"].link_with(b2[">num"])
+        
+        runsys = jb.RunSystem(scheduler="queue")
+        for b in (c1, b1, b2):
+            runsys.add_block(b)
+        runsys.set_monitor(jb.Monitor())
+        runsys.run_loop("threads")
+        
+        slowest = runsys.monitor.report()["blocks"][0]
+        self.assertEqual(slowest["name"], "AutoBlock")
+        self.assertGreaterEqual(slowest["wall_ms"], 20)
+        self.assertLess(slowest["cpu_ms"], slowest["wall_ms"])
+    
+    def test_processes(self):
+        runsys, (c1, b1, b2, b3, b4) = build_lvl4()
+        runsys.set_monitor(jb.Monitor())
+        runsys.run_loop("processes", workers=2)
+        
+        self.assertAlmostEqual(b3['<result'].value, 5.3571, 4)
+        self.assertEqual(runsys.monitor.records[b3].calls, 1)
+    
+    def test_async(self):
+        async def wait(num: float):
+            await asyncio.sleep(0.01)
+            return num
+        
+        c1 = jb.BlockConfig({"x": 1})
+        b1 = jb.AutoBlock(wait, {"y": float})
+        c1["<x"].link_with(b1[">num"])
+        
+        runsys = jb.RunSystem()
+        runsys.add_block(c1)
+        runsys.add_block(b1)
+        runsys.set_monitor(jb.Monitor())
+        runsys.run_loop("async")
+        
+        self.assertGreaterEqual(runsys.monitor.records[b1].wall, 0.01)
+
+
+
+class TestTrace(unittest.TestCase):
+    def build(self, function, count):
+        c1 = jb.BlockConfig({"x": 1})
+        runsys = jb.RunSystem(scheduler="queue")
+        runsys.add_block(c1)
+        for _ in range(count):
+            block = jb.AutoBlock(function, {"y": float})
+            c1["<x"].link_with(block[">num"])
+            runsys.add_block(block)
+        runsys.set_monitor(jb.Monitor(trace=True))
+        return runsys
+    
+    def test_threads(self):
+        def slow(num: float):
+            time.sleep(0.01)
+            return num
+        
+        runsys = self.build(slow, 4)
+        runsys.run_loop("threads", workers=2)
+        with tempfile.TemporaryDirectory() as temp:
+            path = os.path.join(temp, "trace.json")
+            runsys.export_trace(path)
+            with open(path) as injson:
+                events = json.load(injson)["traceEvents"]
+        
+        spans = [e for e in events if e.get("cat") == "block"]
+        self.assertEqual(len(spans), 4)
+        self.assertEqual(len({e["tid"] for e in spans}), 2)
+        self.assertEqual(len([e for e in events if e.get("cat") == "loop"]), 1)
+        
+        # Two workers for four blocks, the last ones waited for a free worker
+        waits = sorted(e["args"]["wait_ms"] for e in spans)
+        self.assertGreater(waits[-1], 5)
+        self.assertEqual(len([e for e in events if e.get("cat") == "wait"]), 8)
+    
+    def test_async_lanes(self):
+        async def wait(num: float):
+            await asyncio.sleep(0.01)
+            return num
+        
+        runsys = self.build(wait, 3)
+        runsys.run_loop("async")
+        spans = [e for e in runsys.monitor.trace_events() if e.get("cat") == "block"]
+        
+        # Same thread, overlapping in time, so each one gets a lane
+        self.assertEqual(len({e["tid"] for e in spans}), 3)
+    
+    def test_serial_plan(self):
+        def slow(num: float):
+            time.sleep(0.01)
+            return num
+        
+        runsys = self.build(slow, 3)
+        runsys.scheduler = "plan"
+        runsys.run_loop()
+        spans = [e for e in runsys.monitor.trace_events() if e.get("cat") == "block"]
+        
+        # All ready at once behind the config, each one waited for those before it
+        self.assertEqual(len(spans), 3)
+        waits = sorted(e["args"]["wait_ms"] for e in spans)
+        self.assertGreater(waits[-1], 15)
+        self.assertEqual(len([e for e in runsys.monitor.trace_events() if e.get("cat") == "wait"]), 6)
+    
+    def test_no_trace(self):
+        runsys = self.build(lambda num: num, 1)
+        runsys.set_monitor(jb.Monitor())
+        runsys.run_loop()
+        
+        self.assertEqual(runsys.monitor.spans, [])
+        with self.assertRaises(Exception):
+            runsys.export_trace(os.devnull)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,557 @@
+import os
+import time
+import asyncio
+import unittest
+import itertools
+import importlib.util
+import threading
+import jabuti as jb
+from jabuti.core.link import deferred, is_deferred
+
+
+
+def build_lvl4(**kwargs) -> tuple[jb.RunSystem, list[jb.Block]]:
+    c1 = jb.BlockConfig({"x1": 10, "x2": 5, "x3": 60 ,"y": 12, "z": 2})
+    
+    b1 = jb.builtin.BlockSum()
+    jb.Link(c1["<x1"], b1[">nums"])
+    jb.Link(c1["<x2"], b1[">nums"])
+    jb.Link(c1["<x3"], b1[">nums"])
+    
+    b2 = jb.builtin.BlockAdd()
+    jb.Link(c1["<y"], b2[">num1"])
+    jb.Link(c1["<z"], b2[">num2"])
+    jb.Link(b1.runflag, b2.enabler)
+    
+    b3 = jb.builtin.BlockDiv()
+    jb.Link(b1["<sum"], b3[">num"])
+    jb.Link(b2["<sum"], b3[">div"])
+    
+    b4 = jb.builtin.BlockInv()
+    jb.Link(b1["<sum"], b4[">num"])
+    
+    runsys = jb.RunSystem(**kwargs)
+    # Registered backwards on purpose, the plan must fix the order
+    for b in [b4, b3, b2, b1, c1]:
+        runsys.add_block(b)
+    return runsys, [c1, b1, b2, b3, b4]
+
+
+class TestPlan(unittest.TestCase):
+    def test_order(self):
+        runsys, (c1, b1, b2, b3, b4) = build_lvl4()
+        plan = runsys.compile_plan()
+        
+        self.assertEqual(len(plan), 5)
+        self.assertLess(plan.index(c1), plan.index(b1))
+        self.assertLess(plan.index(b1), plan.index(b2))
+        self.assertLess(plan.index(b2), plan.index(b3))
+        self.assertLess(plan.index(b1), plan.index(b4))
+    
+    def test_reuse(self):
+        runsys, (c1, b1, b2, b3, b4) = build_lvl4()
+        runsys.run_loop()
+        plan = runsys.plan
+        runsys.run_loop()
+        
+        self.assertIs(runsys.plan, plan)
+        self.assertAlmostEqual(b3['<result'].value, 5.3571, 4)
+        self.assertEqual(b4['<inv'].value, -75)
+    
+    def test_rebuild(self):
+        runsys, (c1, b1, b2, b3, b4) = build_lvl4()
+        runsys.run_loop()
+        plan = runsys.plan
+        
+        b5 = jb.builtin.BlockInv()
+        jb.Link(b4["<inv"], b5[">num"])
+        runsys.add_block(b5)
+        runsys.run_loop()
+        
+        self.assertIsNot(runsys.plan, plan)
+        self.assertEqual(b5['<inv'].value, 75)
+    
+    def test_empty(self):
+        runsys = jb.RunSystem()
+        runsys.run_loop()
+        
+        self.assertTrue(runsys.finished)
+    
+    def test_assigned_anchors(self):
+        class Double(jb.Block):
+            def __init__(self):
+                super().__init__(lambda x: x * 2)
+                self.inputs["x"] = jb.Input(self, "x", int)
+                self.outputs["y"] = jb.Output(self, "y", int)
+        
+        c1 = jb.BlockConfig({"x": 3})
+        d1, d2 = Double(), Double()
+        jb.Link(c1["<x"], d1[">x"])
+        jb.Link(d1["<y"], d2[">x"])
+        
+        # Added downstream first, only the links can put them in order
+        runsys = jb.RunSystem()
+        for block in (d2, d1, c1):
+            runsys.add_block(block)
+        runsys.run_loop()
+        
+        self.assertEqual(d2["<y"].value, 12)
+        self.assertEqual(list(runsys.get_successors(d1)), [d2])
+
+
+
+class TestIndex(unittest.TestCase):
+    def test_lvl4(self):
+        runsys, (c1, b1, b2, b3, b4) = build_lvl4()
+        
+        self.assertEqual(set(runsys.get_successors(c1)), {b1, b2})
+        self.assertEqual(set(runsys.get_successors(b1)), {b2, b3, b4})
+        self.assertEqual(set(runsys.get_predecessors(b3)), {b1, b2})
+        self.assertEqual(runsys.successors[c1][b1], 3)
+    
+    def test_edits(self):
+        runsys, (c1, b1, b2, b3, b4) = build_lvl4()
+        runsys.get_index()
+        
+        lid = runsys.add_link((5, "x1"), (1, "num"))
+        self.assertEqual(runsys.index_revision, runsys.revision())
+        self.assertIn(b4, runsys.get_successors(c1))
+        
+        runsys.rmv_link(lid)
+        self.assertNotIn(b4, runsys.get_successors(c1))
+        self.assertEqual(runsys.index_revision, runsys.revision())
+        
+        runsys.rmv_block(3) # b2
+        self.assertEqual(set(runsys.get_predecessors(b3)), {b1})
+        self.assertNotIn(b2, runsys.successors)
+    
+    def test_outside(self):
+        runsys, (c1, b1, b2, b3, b4) = build_lvl4()
+        runsys.get_index()
+        jb.Link(b3["<result"], b4.enabler)
+        
+        self.assertEqual(set(runsys.get_predecessors(b4)), {b1, b3})
+    
+    def test_query_cost(self):
+        def chain(size):
+            runsys = jb.RunSystem()
+            blocks = [jb.BlockConfig({"x": 1})] + [jb.builtin.Abs() for _ in range(size)]
+            for b0, b1 in zip(blocks, blocks[1:]):
+                jb.Link(b0["<x" if b0 is blocks[0] else "<abs"], b1[">num"])
+            for block in blocks:
+                runsys.add_block(block)
+            runsys.get_index()
+            return runsys, blocks[1]
+        
+        def cost(runsys, block):
+            start = time.perf_counter()
+            for _ in range(2000):
+                runsys.get_successors(block)
+            return time.perf_counter() - start
+        
+        # A hundred times more blocks, the lookups must not follow
+        small, large = chain(100), chain(10_000)
+        ratio = min(cost(*large) for _ in range(5)) / min(cost(*small) for _ in range(5))
+        self.assertLess(ratio, 10)
+
+
+class TestQueue(unittest.TestCase):
+    def test_lvl4(self):
+        runsys, (c1, b1, b2, b3, b4) = build_lvl4(scheduler="queue")
+        runsys.run_loop()
+        
+        self.assertTrue(runsys.finished)
+        self.assertAlmostEqual(b3['<result'].value, 5.3571, 4)
+        
+        runsys.run_loop()
+        self.assertAlmostEqual(b3['<result'].value, 5.3571, 4)
+        self.assertEqual(b4['<inv'].value, -75)
+        self.assertEqual(b2.ready_queue, None)
+    
+    def test_disabled(self):
+        runsys, (c1, b1, b2, b3, b4) = build_lvl4(scheduler="queue")
+        jb.Group([b1], False)
+        runsys.run_loop()
+        
+        for block in (b1, b2, b3, b4):
+            self.assertFalse(block.status)
+
+
+
+class TestDeferred(unittest.TestCase):
+    def test_lvl4(self):
+        for scheduler in ("plan", "queue"):
+            runsys, (c1, b1, b2, b3, b4) = build_lvl4(scheduler=scheduler, propagation="deferred")
+            runsys.run_loop()
+            
+            self.assertAlmostEqual(b3['<result'].value, 5.3571, 4)
+            self.assertEqual(b4['<inv'].value, -75)
+            self.assertFalse(is_deferred())
+    
+    def test_threads(self):
+        runsys, (c1, b1, b2, b3, b4) = build_lvl4(scheduler="queue", propagation="deferred")
+        runsys.run_loop("threads", workers=2)
+        
+        self.assertAlmostEqual(b3['<result'].value, 5.3571, 4)
+    
+    def test_batch(self):
+        c1 = jb.BlockConfig({"x": 1, "y": 2})
+        b1 = jb.builtin.BlockSum()
+        with deferred():
+            c1["<x"].link_with(b1[">nums"])
+            c1["<y"].link_with(b1[">nums"])
+            self.assertFalse(b1[">nums"].status)
+        
+        self.assertEqual(b1[">nums"].value, [1, 2])
+    
+    def test_other_thread(self):
+        # A flow built on another thread propagates right away, unaffected
+        c1 = jb.BlockConfig({"x": 1})
+        b1 = jb.builtin.Abs()
+        seen = []
+        def build():
+            seen.append(is_deferred())
+            c1["<x"].link_with(b1[">num"])
+            seen.append(b1[">num"].status)
+        
+        with deferred():
+            thread = threading.Thread(target=build)
+            thread.start()
+            thread.join()
+            self.assertTrue(is_deferred())
+        
+        self.assertEqual(seen, [False, True])
+    
+    def test_setup(self):
+        runsys = jb.RunSystem()
+        runsys.setup(
+            blocks={
+                "b1": {"class": "jabuti.builtin.config.Config", "params": {"values": {"x": 3, "y": 4}}},
+                "b2": {"class": "jabuti.builtin.sample.BlockSum"},
+            },
+            links={"l1": "b1<x-b2>nums", "l2": "b1<y-b2>nums"},
+        )
+        
+        self.assertEqual(runsys["b2>nums"].value, [3, 4])
+
+
+class TestThreads(unittest.TestCase):
+    def test_lvl4(self):
+        runsys, (c1, b1, b2, b3, b4) = build_lvl4()
+        runsys.run_loop("threads", workers=2)
+        
+        self.assertTrue(runsys.finished)
+        self.assertAlmostEqual(b3['<result'].value, 5.3571, 4)
+        self.assertEqual(b4['<inv'].value, -75)
+    
+    def test_parallel(self):
+        # Both blocks must be inside their function at the same time
+        barrier = threading.Barrier(2, timeout=5)
+        def func(num: float):
+            barrier.wait()
+            return num * 2
+        
+        c1 = jb.BlockConfig({"x": 1, "y": 2})
+        b1 = jb.AutoBlock(func, {"out": float})
+        b2 = jb.AutoBlock(func, {"out": float})
+        c1["<x"].link_with(b1[">num"])
+        c1["<y"].link_with(b2[">num"])
+        
+        runsys = jb.RunSystem()
+        for b in [c1, b1, b2]:
+            runsys.add_block(b)
+        runsys.run_loop("threads", workers=2)
+        
+        self.assertEqual(b1["<out"].value, 2)
+        self.assertEqual(b2["<out"].value, 4)
+
+
+
+class TestProcesses(unittest.TestCase):
+    def test_lvl4(self):
+        runsys, (c1, b1, b2, b3, b4) = build_lvl4()
+        runsys.run_loop("processes", workers=2)
+        
+        self.assertTrue(runsys.finished)
+        self.assertAlmostEqual(b3['<result'].value, 5.3571, 4)
+        self.assertEqual(b4['<inv'].value, -75)
+    
+    @unittest.skipUnless(hasattr(os, "fork"), "fork is not available")
+    def test_forked(self):
+        def func(num: float):
+            return os.getpid()
+        
+        c1 = jb.BlockConfig({"x": 1})
+        b1 = jb.AutoBlock(func, {"pid": int})
+        c1["<x"].link_with(b1[">num"])
+        
+        runsys = jb.RunSystem()
+        for b in [c1, b1]:
+            runsys.add_block(b)
+        runsys.run_loop("processes")
+        
+        self.assertNotEqual(b1["<pid"].value, os.getpid())
+        self.assertTrue(b1.runflag.value)
+
+
+
+class TestAsync(unittest.TestCase):
+    def build(self, func: callable) -> tuple[jb.RunSystem, list[jb.Block]]:
+        c1 = jb.BlockConfig({"x": 1, "y": 2})
+        b1 = jb.AutoBlock(func, {"out": float})
+        b2 = jb.AutoBlock(func, {"out": float})
+        c1["<x"].link_with(b1[">num"])
+        c1["<y"].link_with(b2[">num"])
+        
+        runsys = jb.RunSystem()
+        for b in [c1, b1, b2]:
+            runsys.add_block(b)
+        return runsys, [c1, b1, b2]
+    
+    def test_concurrent(self):
+        async def func(num: float):
+            # Both blocks must be awaiting at the same time
+            await asyncio.wait_for(barrier.wait(), 5)
+            return num * 2
+        
+        async def main():
+            await runsys.run_loop_async()
+        
+        barrier = asyncio.Barrier(2)
+        runsys, (c1, b1, b2) = self.build(func)
+        asyncio.run(main())
+        
+        self.assertEqual(b1["<out"].value, 2)
+        self.assertEqual(b2["<out"].value, 4)
+    
+    def test_executors(self):
+        async def func(num: float):
+            await asyncio.sleep(0)
+            return num * 2
+        
+        runsys, (c1, b1, b2) = self.build(func)
+        for executor in ["async", "serial", "threads"]:
+            runsys.run_loop(executor)
+            self.assertEqual(b1["<out"].value, 2)
+            self.assertEqual(b2["<out"].value, 4)
+    
+    def test_wrapped(self):
+        # Not a coroutine function, yet it gives back a coroutine
+        async def double(num: float):
+            await asyncio.sleep(0)
+            return num * 2
+        
+        def func(num: float):
+            return double(num)
+        
+        runsys, (c1, b1, b2) = self.build(func)
+        for executor in ["async", "serial"]:
+            runsys.run_loop(executor)
+            self.assertEqual(b1["<out"].value, 2)
+            self.assertEqual(b2["<out"].value, 4)
+
+
+
+class TestIncremental(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        def func(num: float):
+            self.calls.append(num)
+            if isinstance(num, list):
+                num = sum(num)
+            return num + 1
+        
+        self.c1 = jb.BlockConfig({"x": 1, "y": 10})
+        self.b1 = jb.AutoBlock(func, {"out": float})
+        self.b2 = jb.AutoBlock(func, {"out": float})
+        self.b3 = jb.AutoBlock(func, {"out": float})
+        self.c1["<x"].link_with(self.b1[">num"])
+        self.b1["<out"].link_with(self.b2[">num"])
+        self.c1["<y"].link_with(self.b3[">num"])
+        
+        self.runsys = jb.RunSystem()
+        for b in [self.c1, self.b1, self.b2, self.b3]:
+            self.runsys.add_block(b)
+        self.runsys.run_loop(incremental=True)
+        self.calls.clear()
+    
+    def test_nothing(self):
+        self.runsys.run_loop(incremental=True)
+        
+        self.assertEqual(self.calls, [])
+        self.assertEqual(self.b2["<out"].value, 3)
+    
+    def test_config(self):
+        self.c1.update({"y": 20})
+        self.runsys.run_loop(incremental=True)
+        
+        self.assertEqual(self.calls, [20])
+        self.assertEqual(self.b2["<out"].value, 3)
+        self.assertEqual(self.b3["<out"].value, 21)
+    
+    def test_link(self):
+        lid = self.runsys.add_link((1, "y"), (2, "num"))
+        self.runsys.run_loop(incremental=True)
+        
+        self.assertEqual(self.calls, [[1, 10], 12])
+        
+        self.runsys.rmv_link(lid)
+        self.calls.clear()
+        self.runsys.run_loop("threads", incremental=True)
+        
+        self.assertEqual(self.calls, [1, 2])
+    
+    def test_outside(self):
+        # A link the system did not make at one of its blocks means starting from scratch
+        self.c1["<y"].link_with(jb.builtin.BlockInv()[">num"])
+        self.runsys.run_loop(incremental=True)
+        
+        self.assertEqual(sorted(self.calls), [1, 2, 10])
+    
+    def test_group(self):
+        # Enablers set by hand, not through a link, are seen as well
+        group = jb.Group([self.b2])
+        group.update(False)
+        self.runsys.run_loop(incremental=True)
+        
+        self.assertEqual(self.calls, [])
+        self.assertFalse(self.b2.status)
+        self.assertIsNone(self.b2["<out"].value)
+        
+        group.update(True)
+        self.runsys.run_loop(incremental=True)
+        
+        self.assertEqual(self.calls, [2])
+        self.assertEqual(self.b2["<out"].value, 3)
+    
+    def test_unrelated(self):
+        # Links between blocks of another flow are none of this system's business
+        plan = self.runsys.get_plan()
+        jb.BlockConfig({"z": 1})["<z"].link_with(jb.builtin.BlockInv()[">num"])
+        other = jb.RunSystem()
+        other.setup(
+            blocks={"b1": {"class": "jabuti.builtin.config.Config", "params": {"values": {"x": 1}}}, "b2": {"class": "jabuti.builtin.math.Abs"}},
+            links={"l1": "b1<x-b2>num"},
+        )
+        self.runsys.run_loop(incremental=True)
+        
+        self.assertEqual(self.calls, [])
+        self.assertIs(self.runsys.get_plan(), plan)
+
+
+
+class TestSweep(unittest.TestCase):
+    def setUp(self):
+        self.runsys = jb.RunSystem()
+        self.runsys.setup(
+            blocks={
+                "b1": {"class": "jabuti.builtin.config.Config", "params": {"values": {"x": 1, "y": 2}}},
+                "b2": {"class": "jabuti.builtin.math.Pow"},
+                "b3": {"class": "jabuti.builtin.math.Abs"},
+            },
+            links={
+                "l1": "b1<x-b2>num",
+                "l2": "b1<y-b2>exp",
+                "l3": "b2<pow-b3>num",
+            },
+        )
+    
+    def test_columns(self):
+        res = self.runsys.sweep({"b1<x": [1, 2, -3]}, ["b2<pow", "b3<neg"], vectorize=False)
+        
+        self.assertEqual(res["b2<pow"], [1, 4, 9])
+        self.assertEqual(res["b3<neg"], [-1, -4, -9])
+        self.assertEqual(self.runsys["b1<x"].value, 1)
+    
+    def test_rows(self):
+        rows = [{"b1<x": 2, "b1<y": 3}, {"b1<x": 3, "b1<y": 2}]
+        res = self.runsys.sweep(rows, ["b3<abs"])
+        
+        self.assertEqual(res["b3<abs"], [8, 9])
+        
+        self.runsys.run_loop(incremental=True)
+        self.assertEqual(self.runsys["b3<abs"].value, 1)
+    
+    def test_not_config(self):
+        with self.assertRaises(Exception):
+            self.runsys.sweep({"b2<pow": [1]}, ["b3<abs"])
+    
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "numpy is not installed")
+    def test_vectorized(self):
+        import numpy as np
+        res = self.runsys.sweep({"b1<x": np.arange(1000)}, ["b3<abs"])
+        
+        self.assertEqual(res["b3<abs"][-1], 999 ** 2)
+        self.assertEqual(self.runsys["b2"].status, True)
+    
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "numpy is not installed")
+    def test_same_values(self):
+        # Arrays must not change the results: big ints, complex roots
+        table = {"b1<x": [10, -4, 2.5], "b1<y": [30, 0.5, 2]}
+        vec = self.runsys.sweep(table, ["b2<pow", "b3<abs"])
+        rows = self.runsys.sweep(table, ["b2<pow", "b3<abs"], vectorize=False)
+        
+        self.assertEqual(vec, rows)
+        self.assertEqual(vec["b2<pow"][0], 10 ** 30)
+        self.assertIsInstance(vec["b2<pow"][1], complex)
+    
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "numpy is not installed")
+    def test_same_errors(self):
+        runsys = jb.RunSystem()
+        runsys.setup(
+            blocks={
+                "b1": {"class": "jabuti.builtin.config.Config", "params": {"values": {"x": 1}}},
+                "b2": {"class": "jabuti.builtin.math.Inv"},
+                "b3": {"class": "jabuti.builtin.math.Sqrt"},
+            },
+            links={"l1": "b1<x-b2>num", "l2": "b1<x-b3>num"},
+        )
+        self.assertEqual(runsys.sweep({"b1<x": [-4, 4]}, ["b3<sqrt"]), runsys.sweep({"b1<x": [-4, 4]}, ["b3<sqrt"], vectorize=False))
+        for vectorize in [True, False]:
+            with self.assertRaises(ZeroDivisionError):
+                runsys.sweep({"b1<x": [2, 0]}, ["b2<inv"], vectorize=vectorize)
+
+
+
+class TestStream(unittest.TestCase):
+    def setUp(self):
+        self.runsys = jb.RunSystem()
+        self.runsys.setup(
+            blocks={
+                "b1": {"class": "jabuti.builtin.config.Config", "params": {"values": {"x": [], "y": 0}}},
+                "b2": {"class": "jabuti.builtin.bool.Cmp"},
+                "b3": {"class": "jabuti.builtin.sample.BlockInv"},
+                "b4": {"class": "jabuti.builtin.math.Abs"},
+            },
+            links={
+                "l1": "b1<x-b2>x",
+                "l2": "b1<y-b2>y",
+                "l3": "b1<x-b3>num",
+                "l4": "b2<gt-b3>enabler",
+                "l5": "b3<inv-b4>num",
+            },
+        )
+    
+    def test_items(self):
+        self.runsys["b1"].update({"x": [-2, 5, -7, 3]})
+        res = list(self.runsys.stream(["b1<x"], ["b3<inv", "b4<abs", "b2<lt"]))
+        
+        self.assertEqual([r["b3<inv"] for r in res], [None, -5, None, -3])
+        self.assertEqual([r["b4<abs"] for r in res], [None, 5, None, 3])
+        self.assertEqual([r["b2<lt"] for r in res], [True, False, True, False])
+    
+    def test_lazy(self):
+        # Endless source, only what is pulled gets computed
+        self.runsys["b1"].update({"x": itertools.count(1)})
+        res = self.runsys.stream(["b1<x"], ["b4<neg"])
+        
+        self.assertEqual([r["b4<neg"] for r in itertools.islice(res, 3)], [-1, -2, -3])
+    
+    def test_static(self):
+        with self.assertRaises(Exception):
+            self.runsys.stream(["b1<y"], ["b1<x"])
+
+
+
+if __name__ == "__main__":
+    unittest.main()